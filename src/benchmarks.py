@@ -0,0 +1,754 @@
+"""
+Parity checks and timings for the data processing helpers.
+
+Run from the src directory with the name of a benchmark, e.g. `python benchmarks.py tagging`.
+"""
+import os
+import sys
+import glob
+import time
+import logging
+import pandas as pd
+
+RAW_DATA_DIR = os.path.join("..", "data", "raw")
+
+def load_raw_column(column, pattern="*Homes.csv"):
+    """
+    Reads one column from every matching CSV in data/raw/.
+
+    Parameters:
+    - column (str): The column to read.
+    - pattern (str): Glob pattern of the files to read. Default is "*Homes.csv".
+
+    Returns:
+    - list: The non-null values of the column across all files.
+    """
+    paths = sorted(glob.glob(os.path.join(RAW_DATA_DIR, pattern)))
+    if not paths:
+        raise FileNotFoundError(f"No files matching {pattern} in {RAW_DATA_DIR}")
+    frames = [pd.read_csv(path, usecols=[column], dtype=str) for path in paths]
+    return pd.concat(frames)[column].dropna().tolist()
+
+def tagging_parity(examples=5):
+    """
+    Checks the rule-based address tagger (`rule_tag_addresses`) against the spaCy tagger
+    (`_tag_doc`) on the real address column, for every address the rules classify.
+
+    Parameters:
+    - examples (int): Number of disagreeing addresses to include. Default is 5.
+
+    Returns:
+    - dict: Rule coverage, agreement and mismatch rates, mismatches per component, example
+      mismatches, and rows/sec for each path.
+    """
+    from utils.address_cleaners import rule_tag_addresses, get_nlp, _tag_doc
+
+    addresses = load_raw_column("address")
+
+    start = time.perf_counter()
+    rule_tags = rule_tag_addresses(pd.Series(addresses)).astype(object).where(lambda tags: tags.notna(), None)
+    rule_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    spacy_tags = [_tag_doc(doc) for doc in get_nlp().pipe(addresses, batch_size=1000)]
+    spacy_seconds = time.perf_counter() - start
+
+    classified = [
+        (address, rule, nlp)
+        for address, rule, nlp in zip(addresses, rule_tags.to_dict("records"), spacy_tags)
+        if rule["st_num"] is not None
+    ]
+    mismatches = [(address, rule, nlp) for address, rule, nlp in classified if rule != nlp]
+
+    return {
+        "rows": len(addresses),
+        "rule_coverage": len(classified) / len(addresses),
+        "agreement_rate": 1 - len(mismatches) / len(classified) if classified else None,
+        "mismatch_rate": len(mismatches) / len(classified) if classified else None,
+        "mismatches_by_component": {
+            component: sum(rule[component] != nlp[component] for _, rule, nlp in mismatches)
+            for component in ["st_num", "apt_num", "street"]
+        },
+        "mismatch_examples": [
+            f"{address!r}: rules {rule}, spaCy {nlp}" for address, rule, nlp in mismatches[:examples]
+        ],
+        "rule_rows_per_sec": len(addresses) / rule_seconds,
+        "spacy_rows_per_sec": len(addresses) / spacy_seconds,
+    }
+
+def batch_geocoding(sample_size=400, latency=0.02):
+    """
+    Times sequential and concurrent geocoding of stored addresses against the offline stub backend.
+
+    Parameters:
+    - sample_size (int): Number of stored `new_address` rows to geocode. Default is 400.
+    - latency (float): Simulated seconds per request. Default is 0.02.
+
+    Returns:
+    - dict: Rows/sec for one worker and for the configured worker pool.
+    """
+    from config import geocoding_config
+    from utils.geocode_cache import GeocodeCache
+    from utils.geocoding import batch_geocode
+    from utils.geocoding_backends import StubGeocoder
+
+    paths = sorted(glob.glob(os.path.join(RAW_DATA_DIR, "*Homes.csv")))
+    df = pd.read_csv(paths[-1], usecols=["new_address", "school_district"], dtype=str)
+    df = df.dropna().drop_duplicates().head(sample_size)
+
+    report = {"rows": len(df)}
+    for label, workers in [("sequential", 1), ("concurrent", geocoding_config["max_workers"])]:
+        start = time.perf_counter()
+        batch_geocode(
+            df,
+            backend=StubGeocoder(latency=latency),
+            cache=GeocodeCache(":memory:"),
+            max_workers=workers,
+            requests_per_second=1000,
+        )
+        report[f"{label}_rows_per_sec"] = len(df) / (time.perf_counter() - start)
+    return report
+
+def zip_ranking():
+    """
+    Compares geocoding requests per resolved address with and without ranked candidate zips.
+
+    The newest year's homes whose owners live at the home are the evaluation set, with the owner's
+    postal code as the true zip. The ranker only learns from the other files. An offline stub that
+    resolves only the true zip stands in for Google Maps.
+
+    Returns:
+    - dict: Average requests per resolved address for the `zip_code_map` order, the ranked order
+      from street/district history, and the ranked order that also uses the owner's postal code.
+    """
+    from config import zip_code_map
+    from utils.geocode_cache import GeocodeCache
+    from utils.geocoding import get_address_details_with_cities
+    from utils.geocoding_backends import StubGeocoder
+    from utils.zip_ranking import ZipCandidateRanker
+
+    paths = sorted(glob.glob(os.path.join(RAW_DATA_DIR, "*Homes.csv")))
+    history = paths[:-1] + [os.path.join(RAW_DATA_DIR, "ohio-school-district-shapes", "homes.csv")]
+    ranker = ZipCandidateRanker.from_csvs(history)
+
+    df = pd.read_csv(paths[-1], dtype=str)
+    df = df[(df["owner_home_address_match"] == "Y") & df["school_district"].isin(zip_code_map)]
+    df = df.dropna(subset=["address", "street", "owner_postal_code"]).drop_duplicates(subset=["address"])
+    df = df[[int(zip_code) in zip_code_map[district] for zip_code, district in zip(df["owner_postal_code"], df["school_district"])]]
+
+    backend = StubGeocoder({
+        f"{address} {zip_code}": (f"{address}, OH {zip_code}, USA", 0.0, 0.0)
+        for address, zip_code in zip(df["address"], df["owner_postal_code"])
+    })
+
+    strategies = {
+        "zip_code_map_order": lambda row: None,
+        "ranked_by_history": lambda row: ranker.rank(row.school_district, row.street),
+        "ranked_with_owner_zip": lambda row: ranker.rank(row.school_district, row.street, row.owner_postal_code),
+    }
+    report = {"addresses": len(df)}
+    for name, order in strategies.items():
+        backend.calls = 0
+        cache = GeocodeCache(":memory:")
+        resolved = sum(
+            get_address_details_with_cities(
+                row.address, row.school_district, gmaps=backend, cache=cache, zip_codes=order(row)
+            )["formatted_address"] is not None
+            for row in df.itertuples()
+        )
+        report[f"{name}_requests_per_address"] = backend.calls / resolved if resolved else None
+    return report
+
+def district_lookup():
+    """
+    Looks up the school district of every geocoded home in ohio-school-district-shapes/homes.csv
+    with the offline polygon index. Needs the district shapes listed in `spatial_config`.
+
+    Returns:
+    - dict: Agreement with the scraped school district and points/sec for the lookup.
+    """
+    from utils.spatial_index import get_district_index
+
+    df = pd.read_csv(
+        os.path.join(RAW_DATA_DIR, "ohio-school-district-shapes", "homes.csv"),
+        usecols=["school_district", "longitude", "latitude"],
+    ).dropna()
+    index = get_district_index()
+
+    start = time.perf_counter()
+    districts = index.lookup(df["longitude"], df["latitude"])
+    seconds = time.perf_counter() - start
+
+    return {
+        "points": len(df),
+        "agreement_rate": (districts == df["school_district"].to_numpy()).mean(),
+        "points_per_sec": len(df) / seconds,
+    }
+
+def slice_planning():
+    """
+    Replays each stored year's sales against the results cap and counts the searches needed
+    with reactive midpoint splitting alone and with slices planned up front.
+
+    The planner for each year only learns from the other years, and is fed each search's count
+    and re-plans the rest of the year after each search under the cap, as the real scraper does.
+
+    Returns:
+    - dict: Total searches and over-cap searches (each one a driver restart in `main.py`) per strategy.
+    """
+    from config import scraping_config
+    from utils.date_planning import SlicePlanner, split_date_range
+    from utils.homes_data import parse_transfer_dates
+
+    paths = sorted(glob.glob(os.path.join(RAW_DATA_DIR, "*Homes.csv")))
+    sales = pd.concat(
+        pd.read_csv(path, usecols=["parcel_number", "transfer_date"], dtype=str) for path in paths
+    ).drop_duplicates()
+    sales["transfer_date"] = parse_transfer_dates(sales["transfer_date"])
+    cap = scraping_config["max_entries_per_page"]
+
+    def run_searches(slices, planner=None):
+        searches = over_cap = 0
+        queue = list(slices)
+        while queue:
+            start, end = queue.pop(0)
+            searches += 1
+            count = year_dates.between(pd.to_datetime(start), pd.to_datetime(end)).sum()
+            if planner is not None:
+                planner.observe(start, end, count)
+            if count >= cap:
+                over_cap += 1
+                queue[:0] = split_date_range(start, end)
+            elif planner is not None and queue:
+                # The queue is always one run of dates, as in `main.py` after finishing a slice
+                queue = planner.plan(queue[0][0], queue[-1][1])
+        return searches, over_cap
+
+    report = {"reactive_searches": 0, "reactive_over_cap": 0, "planned_searches": 0, "planned_over_cap": 0}
+    for year in sorted(sales["transfer_date"].dt.year.dropna().unique().astype(int)):
+        year_dates = sales.loc[sales["transfer_date"].dt.year == year, "transfer_date"]
+        planner = SlicePlanner(sales.loc[sales["transfer_date"].dt.year != year, "transfer_date"])
+
+        searches, over_cap = run_searches([(f"01/01/{year}", f"12/31/{year}")])
+        report["reactive_searches"] += searches
+        report["reactive_over_cap"] += over_cap
+
+        searches, over_cap = run_searches(planner.plan_year(year), planner)
+        report["planned_searches"] += searches
+        report["planned_over_cap"] += over_cap
+    return report
+
+def incremental_refresh(new_share=0.02, seconds_per_visit=6.5):
+    """
+    Simulates re-running the latest year in incremental mode: the stored CSVs are indexed, a share
+    of the year's transfers is held back as new sales, and the year's results table is diffed
+    against the index.
+
+    Returns:
+    - dict: Detail pages a full and an incremental run would visit, the time to build the index and
+      diff the results, and the estimated crawl hours at `seconds_per_visit` per property.
+    """
+    from utils.homes_data import StoredTransfers, parse_transfer_dates
+
+    paths = sorted(glob.glob(os.path.join(RAW_DATA_DIR, "[0-9]* Homes.csv")))
+    latest = pd.read_csv(paths[-1], dtype=str)
+    held_back = latest.sample(frac=new_share, random_state=0).index
+
+    # The results table shows dates as MM/DD/YYYY and amounts as "$175,000"
+    results = pd.DataFrame({
+        "Parcel Number": latest["parcel_number"],
+        "Transfer Date": parse_transfer_dates(latest["transfer_date"]).dt.strftime("%m/%d/%Y"),
+        "Amount": latest["amount"].str.strip(),
+    })
+
+    start = time.perf_counter()
+    stored = StoredTransfers.from_csvs([path for path in paths if path != paths[-1]])
+    stored.add(latest.drop(held_back))
+    index_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    wanted = stored.is_new(results)
+    diff_seconds = time.perf_counter() - start
+
+    return {
+        "year_file": os.path.basename(paths[-1]),
+        "stored_transfers": len(stored.keys),
+        "full_visits": len(results),
+        "incremental_visits": sum(wanted),
+        "held_back_new": len(held_back),
+        "index_seconds": round(index_seconds, 3),
+        "diff_seconds": round(diff_seconds, 4),
+        "full_hours": round(len(results) * seconds_per_visit / 3600, 2),
+        "incremental_hours": round(sum(wanted) * seconds_per_visit / 3600, 2),
+    }
+
+def detail_fetch(sample_size=200, latency=0.05, fixture_dir=os.path.join("..", "data", "fixtures", "property_pages")):
+    """
+    Fetches property pages from a local fixture server with the HTTP detail fetcher, sequentially
+    and concurrently.
+
+    Pages captured from the live site with `save_property_page` in `fixture_dir` are used when
+    there are any, and their parsed fields are checked against the stored homes. Otherwise pages
+    are rendered from the latest stored year with `render_property_page`, which only measures
+    throughput: those pages are built from the values they would be compared with.
+
+    Returns:
+    - dict: Pages/sec for each setting, the page source, and for captured pages the share of
+      parsed fields matching the stored values.
+    """
+    import tempfile
+    import requests
+    from utils.detail_fetch import fetch_property_details
+    from utils.fixture_server import FixtureServer, render_property_page
+
+    paths = sorted(glob.glob(os.path.join(RAW_DATA_DIR, "[0-9]* Homes.csv")))
+    homes = pd.concat([pd.read_csv(path, dtype=str) for path in paths]).drop_duplicates("parcel_number", keep="last")
+    captured = sorted(glob.glob(os.path.join(fixture_dir, "*.html")))[:sample_size]
+
+    with tempfile.TemporaryDirectory() as directory:
+        if captured:
+            directory = fixture_dir
+            parcels = {os.path.splitext(os.path.basename(path))[0] for path in captured}
+            homes = homes[homes["parcel_number"].str.replace("-", "").isin(parcels)]
+        else:
+            homes = homes[homes["parcel_number"].isin(pd.read_csv(paths[-1], dtype=str)["parcel_number"])]
+            homes = homes.head(sample_size)
+            labels = {
+                "Year Built": "year_built", "Total Rooms": "total_rooms", "# Bedrooms": "bedrooms",
+                "# Full Bathrooms": "full_baths", "# Half Bathrooms": "half_baths",
+                "Conveyance Number": "conveyance_number", "Deed Type": "deed_type", "Acreage": "acreage",
+            }
+            for _, home in homes.iterrows():
+                page = render_property_page(
+                    home["parcel_number"],
+                    {label: home[column] for label, column in labels.items()},
+                    home["school_district"],
+                    home["owner_address"],
+                )
+                with open(os.path.join(directory, f"{home['parcel_number'].replace('-', '')}.html"), "w") as file:
+                    file.write(page)
+
+        report = {"page_source": "captured" if captured else "rendered (throughput only)", "pages": len(homes)}
+        with FixtureServer(directory, latency=latency) as server, requests.Session() as session:
+            for workers in (1, 8):
+                start = time.perf_counter()
+                details = fetch_property_details(
+                    homes["parcel_number"].tolist(), session, max_workers=workers,
+                    requests_per_second=1000, url_template=server.url_template,
+                )
+                report[f"pages_per_sec_{workers}_workers"] = round(len(homes) / (time.perf_counter() - start), 1)
+
+    report["fetched"] = sum(df is not None for df in details)
+    if captured and report["fetched"]:
+        fetched = pd.concat([df for df in details if df is not None]).reset_index(drop=True)
+        expected = homes.set_index("parcel_number").loc[fetched["parcel_id"]].reset_index()
+        fields = {"Bedrooms": "bedrooms", "Full Baths": "full_baths",
+                  "school_district": "school_district", "owner_address": "owner_address"}
+        for field, column in fields.items():
+            matches = fetched[field].astype(str).str.strip() == expected[column].fillna("nan").astype(str).str.strip()
+            report[f"{field}_match_rate"] = round(float(matches.mean()), 4)
+    return report
+
+def adaptive_throttle(properties=876, capacity_rpm=12, latency_per_rpm=1.0, base_latency=1.5,
+                      slowdown=(300, 500, 4), timeout_every=150):
+    """
+    Replays a slice of `properties` page loads against a simulated site. Pages take `base_latency`
+    seconds, plus `latency_per_rpm` seconds for every request per minute above the site's
+    capacity. The capacity is `capacity_rpm`, except between the page numbers of `slowdown`, where
+    it drops to its third value. Every `timeout_every`-th page times out.
+
+    The adaptive throttle is compared with the fixed 5-8 second pause and with running at the
+    throttle's ceiling without backing off.
+
+    Returns:
+    - dict: Estimated minutes for each approach, the adaptive throttle's mean rate inside and
+      outside the slowdown, how often it backed off, and its metrics.
+    """
+    from config import scraping_config
+    from utils.rate_limiting import AdaptiveRateLimiter
+
+    slow_start, slow_end, slow_capacity = slowdown
+
+    def site_latency(page, rpm):
+        capacity = slow_capacity if slow_start <= page < slow_end else capacity_rpm
+        if (page + 1) % timeout_every == 0:
+            return scraping_config["page_load_timeout"], False
+        latency = base_latency + max(0.0, rpm - capacity) * latency_per_rpm
+        if latency >= scraping_config["page_load_timeout"]:
+            return scraping_config["page_load_timeout"], False
+        return latency, True
+
+    def page_seconds(rpm, latency):
+        # A page load starts once its slot comes up and the previous page has finished
+        return max(60 / rpm, latency)
+
+    throttle = AdaptiveRateLimiter.from_config(scraping_config)
+    throttle.report_every = properties + 1
+    adaptive_seconds, rates, backoffs = 0.0, [], 0
+    for page in range(properties):
+        rpm = throttle.requests_per_minute
+        rates.append(rpm)
+        latency, ok = site_latency(page, rpm)
+        adaptive_seconds += page_seconds(rpm, latency)
+        throttle.record(latency, ok=ok)
+        backoffs += throttle.requests_per_minute < rpm
+
+    ceiling_rpm = scraping_config["politeness_requests_per_minute"]
+    ceiling_seconds = sum(page_seconds(ceiling_rpm, site_latency(page, ceiling_rpm)[0]) for page in range(properties))
+    # The fixed pause waits 6.5 seconds on average after each page has loaded
+    fixed_seconds = 0.0
+    for page in range(properties):
+        latency = site_latency(page, 60 / (6.5 + base_latency))[0]
+        fixed_seconds += 6.5 + latency
+
+    inside = rates[slow_start:slow_end]
+    outside = rates[:slow_start] + rates[slow_end:]
+    return {
+        "fixed_pause_minutes": round(fixed_seconds / 60, 1),
+        "ceiling_minutes": round(ceiling_seconds / 60, 1),
+        "adaptive_minutes": round(adaptive_seconds / 60, 1),
+        "mean_rpm_outside_slowdown": round(sum(outside) / len(outside), 2),
+        "mean_rpm_during_slowdown": round(sum(inside) / len(inside), 2),
+        "backoffs": backoffs,
+        **throttle.metrics(),
+    }
+
+def table_parsing(rows=1000, repeats=20):
+    """
+    Times `pd.read_html` against `parse_html_table` on a results table rebuilt from the latest
+    stored year, as the results page would show it.
+
+    Returns:
+    - dict: Milliseconds per table for each parser, the speedup, and whether both give the same values.
+    """
+    import html
+    from io import StringIO
+    from utils.html_tables import parse_html_table
+
+    columns = ["Parcel Number", "Address", "BBB", "FinSqFt", "Use", "Year Built", "Transfer Date", "Amount"]
+    dtypes = {"FinSqFt": "Int64", "Use": "Int64", "Year Built": "Int64"}
+    paths = sorted(glob.glob(os.path.join(RAW_DATA_DIR, "[0-9]* Homes.csv")))
+    homes = pd.read_csv(paths[-1], dtype=str).head(rows)
+    homes = homes[["parcel_number", "address", "bbb", "finsqft", "use", "year_built", "transfer_date", "amount"]]
+
+    header = "".join(f"<th>{column}</th>" for column in columns)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(str(value).strip())}</td>" for value in row) + "</tr>"
+        for row in homes.itertuples(index=False)
+    )
+    table_html = f'<table id="search-results"><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>'
+
+    report = {"rows": len(homes)}
+    start = time.perf_counter()
+    for _ in range(repeats):
+        expected = pd.read_html(StringIO(table_html))[0]
+    report["read_html_ms"] = round((time.perf_counter() - start) / repeats * 1000, 2)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        parsed = parse_html_table(table_html, columns=columns, dtypes=dtypes)
+    report["parse_html_table_ms"] = round((time.perf_counter() - start) / repeats * 1000, 2)
+    report["speedup"] = round(report["read_html_ms"] / report["parse_html_table_ms"], 1)
+
+    def normalize(df):
+        return df.astype("string").fillna("")
+
+    report["same_values"] = bool((normalize(expected) == normalize(parsed)).all().all())
+    return report
+
+def homes_memory(pattern="[0-9]* Homes.csv", repeats=20):
+    """
+    Compares the memory use and group-by speed of the homes CSVs loaded as text with the typed,
+    compact homes schema.
+
+    Returns:
+    - dict: Rows, megabytes as object columns, as read by default and typed with categoricals, and
+      the time of a district/deed type group-by on each.
+    """
+    from utils.homes_data import load_homes_csvs
+
+    patterns = [os.path.join(RAW_DATA_DIR, pattern)]
+    paths = sorted(glob.glob(patterns[0]))
+    as_object = pd.concat([pd.read_csv(path, dtype=object) for path in paths], ignore_index=True)
+    as_read = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+    start = time.perf_counter()
+    typed = load_homes_csvs(patterns)
+    load_seconds = time.perf_counter() - start
+
+    def megabytes(df):
+        return round(df.memory_usage(deep=True).sum() / 1e6, 2)
+
+    def group_ms(df):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            df.groupby(["school_district", "deed_type"], observed=True)["transfer_date"].count()
+        return round((time.perf_counter() - start) / repeats * 1000, 2)
+
+    report = {
+        "rows": len(typed),
+        "object_mb": megabytes(as_object),
+        "default_read_mb": megabytes(as_read),
+        "typed_mb": megabytes(typed),
+        "typed_load_seconds": round(load_seconds, 2),
+        "object_groupby_ms": group_ms(as_object),
+        "typed_groupby_ms": group_ms(typed),
+    }
+    report["memory_reduction"] = round(report["object_mb"] / report["typed_mb"], 1)
+    return report
+
+def _row_by_row_address_cleanup(df):
+    """The address cleanup of `process_home_data` before it was vectorized, kept for comparison."""
+    import re
+    import numpy as np
+    from config import street_type_map, school_city_map
+    from utils.address_cleaners import tag_address_columns
+
+    pattern = r'\b(' + '|'.join(map(re.escape, street_type_map.keys())) + r')\b'
+    df = df.assign(address=df["address"].str.replace(pattern, lambda m: street_type_map[m.group(0)], regex=True))
+
+    owner_pattern = r"(?P<address>.+?)\r?\n(?P<city>[A-Z\s]+) (?P<state>[A-Z]{2}) (?P<postal_code>\d{5})"
+    extracted = df["owner_address"].str.extract(owner_pattern)
+    extracted.columns = ["owner_street_address", "owner_city", "owner_state", "owner_postal_code"]
+    df = pd.concat([df, extracted], axis=1)
+    same_number = df["address"].str.split(expand=True)[0] == df["owner_street_address"].str.split(expand=True)[0]
+    df.loc[same_number, "owner_home_address_match"] = "Y"
+    df.loc[df["owner_home_address_match"] != "Y", "owner_home_address_match"] = "N"
+
+    address_parts = [{**tags, "parcel_number": parcel} for parcel, tags in zip(df.parcel_number, tag_address_columns(df.address).to_dict("records"))]
+    address_df = pd.DataFrame.from_dict(address_parts).drop_duplicates()
+    df = df.merge(address_df, on="parcel_number", how="left")
+
+    df["city"] = df.school_district.map(school_city_map)
+    df["state"] = "OH"
+    df["new_address"] = np.where(
+        df["owner_home_address_match"] == "Y",
+        df["owner_street_address"] + " " + df["owner_city"] + ", " + df["owner_state"] + " " + df["owner_postal_code"],
+        df["st_num"] + " " + df["street"] + " " + df["city"] + ", " + df["state"]
+    )
+    return df.drop_duplicates()
+
+def address_cleanup(repeats=3):
+    """
+    Times the vectorized address cleanup of `process_home_data` against the previous row-by-row
+    version on the largest year file, with the derived columns dropped so both rebuild them.
+
+    Returns:
+    - dict: Rows, milliseconds for each version and the share of matching derived values.
+    """
+    from utils.address_cleaners import clean_home_addresses, get_nlp
+
+    paths = sorted(glob.glob(os.path.join(RAW_DATA_DIR, "[0-9]* Homes.csv")), key=os.path.getsize)
+    derived = [
+        "owner_street_address", "owner_city", "owner_state", "owner_postal_code", "owner_home_address_match",
+        "st_num", "apt_num", "street", "city", "state", "new_address",
+    ]
+    homes = pd.read_csv(paths[-1], dtype=str).drop(columns=derived)
+    # Load spaCy up front so neither version is charged for it
+    get_nlp()
+
+    def best_ms(clean):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = clean(homes)
+            timings.append(time.perf_counter() - start)
+        return result, round(min(timings) * 1000, 1)
+
+    legacy, legacy_ms = best_ms(_row_by_row_address_cleanup)
+    vectorized, vectorized_ms = best_ms(clean_home_addresses)
+
+    vectorized = vectorized.drop_duplicates()
+    same = legacy.reset_index(drop=True)[derived].astype("string").fillna("") == \
+        vectorized.reset_index(drop=True)[derived].astype("string").fillna("")
+    return {
+        "file": os.path.basename(paths[-1]),
+        "rows": len(homes),
+        "row_by_row_ms": legacy_ms,
+        "vectorized_ms": vectorized_ms,
+        "speedup": round(legacy_ms / vectorized_ms, 1),
+        "same_rows": len(legacy) == len(vectorized),
+        "matching_values": round(float(same.to_numpy().mean()), 4) if len(legacy) == len(vectorized) else None,
+    }
+
+def homes_loading(cache_path=os.path.join("..", "data", "cache", "benchmark_homes.parquet")):
+    """
+    Times a cold load of every historical homes CSV layout, which rebuilds the Parquet cache,
+    against a warm load from the cache.
+
+    Returns:
+    - dict: Source files, merged rows, seconds for the cold and warm loads, and whether both match.
+    """
+    from config import data_storage
+    from utils.homes_data import homes_csv_paths
+    from utils.homes_cache import load_homes_cached
+
+    start = time.perf_counter()
+    cold = load_homes_cached(cache_path=cache_path, refresh=True)
+    cold_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    warm = load_homes_cached(cache_path=cache_path)
+    warm_seconds = time.perf_counter() - start
+    os.remove(cache_path)
+
+    return {
+        "files": len(homes_csv_paths(data_storage["homes_sources"])),
+        "rows": len(warm),
+        "cold_seconds": round(cold_seconds, 2),
+        "warm_seconds": round(warm_seconds, 3),
+        "same_data": cold.equals(warm),
+    }
+
+def cube_lookup(repeats=50):
+    """
+    Times a dashboard query answered from the homes cube against the same group-by over the
+    raw sales, e.g. the median price of 3 bedroom sales in one district and year.
+
+    Returns:
+    - dict: Milliseconds per query for each path and whether both give the same median.
+    """
+    from utils.homes_store import load_homes
+    from utils.homes_cube import HomesCube, bedroom_buckets
+
+    cube = HomesCube()
+    cube.cube
+    homes = load_homes(columns=["transfer_date", "amount", "bedrooms", "school_district"])
+    query = {"year": 2023, "school_district": "SYCAMORE CSD", "bedroom_bucket": "3"}
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        selected = homes[
+            (homes["transfer_date"].dt.year == query["year"])
+            & (homes["school_district"] == query["school_district"])
+            & (bedroom_buckets(homes["bedrooms"]) == query["bedroom_bucket"])
+        ]
+        raw_median = selected["amount"].median()
+    raw_ms = (time.perf_counter() - start) / repeats * 1000
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        cube_median = cube.lookup(**query)["median_price"].iloc[0]
+    cube_ms = (time.perf_counter() - start) / repeats * 1000
+
+    return {
+        "rows": len(homes),
+        "cube_rows": len(cube.cube),
+        "raw_ms": round(raw_ms, 2),
+        "cube_ms": round(cube_ms, 2),
+        "speedup": round(raw_ms / cube_ms, 1),
+        "same_median": bool(raw_median == cube_median),
+    }
+
+def sql_query(years=range(2021, 2025), school_district="SYCAMORE CSD", min_price=500000):
+    """
+    Times a filtered dashboard query through the SQL layer against loading the whole homes dataset
+    with pandas and filtering in memory, e.g. 2021-2024 sales in SYCAMORE CSD over $500k. Both
+    paths read the same Parquet dataset.
+
+    Returns:
+    - dict: Matching rows and milliseconds for each path, and whether both return the same sales.
+    """
+    from utils.homes_store import HomesStore
+    from utils.homes_sql import HomesSQL, SALES_COLUMNS
+
+    store = HomesStore()
+    start = time.perf_counter()
+    homes = store.read()
+    selected = homes[
+        homes["transfer_date"].dt.year.isin(years)
+        & (homes["school_district"] == school_district)
+        & (homes["amount"] >= min_price)
+    ]
+    pandas_ms = (time.perf_counter() - start) * 1000
+
+    with HomesSQL(store) as sql:
+        start = time.perf_counter()
+        result = sql.sales(years, [school_district], min_price)
+        sql_ms = (time.perf_counter() - start) * 1000
+
+    def sales(df):
+        return sorted(df[SALES_COLUMNS].astype(str).itertuples(index=False, name=None))
+
+    return {
+        "pandas_rows": len(selected),
+        "sql_rows": len(result),
+        "pandas_full_load_ms": round(pandas_ms, 1),
+        "sql_ms": round(sql_ms, 1),
+        "speedup": round(pandas_ms / sql_ms, 1),
+        "same_sales": sales(selected) == sales(result),
+    }
+
+def street_correction(num_queries=1000, cutoff=0.8):
+    """
+    Times correcting owner mailing streets against the street names of the scraped homes, with a
+    linear `difflib.get_close_matches` scan against the trigram `StreetNameIndex`. Half of the
+    queries get one letter dropped so most of them need a fuzzy match.
+
+    Returns:
+    - dict: Vocabulary and query counts, milliseconds for each path, and the share of queries
+      where both return the same name.
+    """
+    import difflib
+    from utils.street_index import StreetNameIndex
+
+    streets = load_raw_column("street", "[0-9]* Homes.csv")
+    vocabulary = list(dict.fromkeys(street.strip().upper() for street in streets))
+    mailing = pd.Series(load_raw_column("owner_street_address", "[0-9]* Homes.csv"))
+    mailing = mailing.str.upper().str.replace(r"^\d+[A-Z]?\s+", "", regex=True).str.strip()
+    queries = list(dict.fromkeys(mailing[mailing != ""]))[:num_queries]
+    queries = [query[:len(query) // 2] + query[len(query) // 2 + 1:] if i % 2 else query for i, query in enumerate(queries)]
+
+    start = time.perf_counter()
+    expected = []
+    for query in queries:
+        matches = difflib.get_close_matches(query, vocabulary, n=1, cutoff=cutoff)
+        expected.append(matches[0] if matches else None)
+    difflib_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    index = StreetNameIndex(vocabulary)
+    build_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    found = [index.best_match(query, cutoff) for query in queries]
+    index_ms = (time.perf_counter() - start) * 1000
+
+    agree = sum(a == b for a, b in zip(expected, found))
+    return {
+        "vocabulary": len(vocabulary),
+        "queries": len(queries),
+        "difflib_ms": round(difflib_ms, 1),
+        "index_build_ms": round(build_ms, 1),
+        "index_ms": round(index_ms, 1),
+        "speedup": round(difflib_ms / (build_ms + index_ms), 1),
+        "agreement": round(agree / len(queries), 4),
+        "matched": sum(match is not None for match in found),
+    }
+
+BENCHMARKS = {
+    "tagging": tagging_parity,
+    "geocoding": batch_geocoding,
+    "zip_ranking": zip_ranking,
+    "district_lookup": district_lookup,
+    "slice_planning": slice_planning,
+    "incremental": incremental_refresh,
+    "detail_fetch": detail_fetch,
+    "throttle": adaptive_throttle,
+    "table_parsing": table_parsing,
+    "homes_memory": homes_memory,
+    "address_cleanup": address_cleanup,
+    "homes_loading": homes_loading,
+    "cube_lookup": cube_lookup,
+    "sql_query": sql_query,
+    "street_correction": street_correction,
+}
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            raise ValueError(f"Unknown benchmark: {name}. Choose from {', '.join(BENCHMARKS)}.")
+        report = BENCHMARKS[name]()
+        print(f"{name}:")
+        for key, value in report.items():
+            print(f"  {key}: {value}")
@@ -24,12 +24,81 @@ logging_config = {
 scraping_config = {
     "page_load_timeout": 30,
     "max_entries_per_page": 1000,
+    # Site-wide ceiling on page loads per minute. It is the most one adaptive browser may reach and
+    # the budget a pool of parallel browsers shares, so this limit always wins.
+    "politeness_requests_per_minute": 20,
+    "shard_dir": "../data/shards/",
+    # Date slices are planned to fill this share of the results cap.
+    "planner_fill_ratio": 0.8,
+    # Finished slices, results pages and extracted parcels, so an interrupted run can resume.
+    "journal_path": "../data/scrape_journal.sqlite",
+    # Request property pages over HTTP with the browser's cookies instead of clicking through them.
+    "fetch_details_over_http": False,
+    "property_url": "https://wedge.hcauditor.org/view/re/{parcel}/summary",
+    "detail_fetch_workers": 4,
+    "detail_fetch_requests_per_second": 2,
+    "detail_fetch_batch_size": 50,
+    # Read all results in one pass by setting the results table's page length to "all".
+    "results_show_all": True,
+    # Adaptive pause between page loads of one browser: the rate grows while pages load quickly,
+    # up to politeness_requests_per_minute, and is cut when a page is slow or fails.
+    "throttle_initial_requests_per_minute": 8,
+    "throttle_min_requests_per_minute": 2,
+    "throttle_increase_requests_per_minute": 0.5,
+    "throttle_decrease_factor": 0.5,
+    "throttle_slow_latency_seconds": 4,
 }
 
 data_storage = {
     "raw": "data/raw/",
     "processed": "data/processed/",
-    "output_file": "data/output.csv"
+    "output_file": "data/output.csv",
+    # Parquet dataset of every scraped home, partitioned by transfer year and month. Relative to src/.
+    "homes_lake": "../data/lake/homes/",
+    # CSVs loaded by the one-time migration, oldest layouts first so the scraped files win.
+    "migration_sources": [
+        "../data/raw/house data/* House Sales.csv",
+        "../data/raw/house data/* Homes V2.csv",
+        "../data/raw/[0-9]* Homes.csv",
+    ],
+    # Every historical homes CSV layout, oldest first so newer files win duplicate sales.
+    "homes_sources": [
+        "../data/raw/ohio-school-district-shapes/homessold2013_2023.csv",
+        "../data/raw/ohio-school-district-shapes/finalsold2013_2023.csv",
+        "../data/raw/ohio-school-district-shapes/homes.csv",
+        "../data/raw/house data/* House Sales.csv",
+        "../data/raw/house data/* Homes V2.csv",
+        "../data/raw/[0-9]* Homes.csv",
+    ],
+    # Merged homes from `homes_sources`, rebuilt when any source file changes.
+    "homes_cache": "../data/cache/homes.parquet",
+    # Sales statistics per year, month, district and bedroom bucket for the dashboard.
+    "homes_cube": "../data/lake/cubes/homes_cube.parquet",
+}
+
+geocoding_config = {
+    # Paths are relative to src/, like the CSV outputs.
+    "cache_path": "../data/geocode_cache.sqlite",
+    # Found addresses rarely move, but a miss may be fixed upstream, so it is retried sooner.
+    "hit_ttl_days": 365,
+    "miss_ttl_days": 30,
+    # Batch geocoding: concurrent lookups sharing one global request budget.
+    "max_workers": 8,
+    "requests_per_second": 10,
+    "retries": 3,
+    "backoff_seconds": 1,
+}
+
+spatial_config = {
+    # The .shp geometry of the bundled layer is not in the repo. Drop it next to the .dbf,
+    # or export the layer as GeoJSON to the second path. The first file found is used.
+    "district_shapes": [
+        "../data/raw/ohio-school-district-shapes/ohio-school-districts.shp",
+        "../data/raw/ohio-school-district-shapes/ohio-school-districts.geojson",
+    ],
+    "district_id_field": "ODE_IRN",
+    # Height of the horizontal bands edges are bucketed into for point-in-polygon tests.
+    "band_height_degrees": 0.005,
 }
 
 street_type_map = {
@@ -79,6 +148,33 @@ school_city_map = {
     'WYOMING CSD':'Wyoming'
 }
 
+# Ohio Department of Education IRN of each school district, as used by the district shapes layer.
+school_district_irn_map = {
+    'CINCINNATI CSD':'043752',
+    'DEER PARK CSD':'043851',
+    'FINNEYTOWN LSD':'047332',
+    'FOREST HILLS LSD':'047340',
+    'INDIAN HILL EVSD':'045435',
+    'LOCKLAND CSD':'044230',
+    'LOVELAND CSD':'044271',
+    'NORTHWEST LSD (HAMILTON CO.)':'047365',
+    'MADEIRA CSD':'044289',
+    'MARIEMONT CSD':'044313',
+    'MILFORD CSD':'045500',
+    'MOUNT HEALTHY CSD':'044412',
+    'NORTH COLLEGE HILL CSD':'044511',
+    'NORWOOD CSD':'044578',
+    'OAK HILLS LSD':'047373',
+    'PRINCETON CSD':'044677',
+    'READING CSD':'044693',
+    'SOUTHWEST LSD (HAMILTON CO.)':'047381',
+    'ST. BERNARD-ELMWOOD PLACE CSD':'044719',
+    'SYCAMORE CSD':'044867',
+    'THREE RIVERS LSD':'047399',
+    'WINTON WOODS CSD':'044081',
+    'WYOMING CSD':'045146'
+}
+
 zip_code_map = {
     'CINCINNATI CSD':[45202, 45203, 45204, 45205, 45206, 45207, 45208, 45209, 45211, 45212, 45213, 45214, 
                       45215, 45216, 45217, 45219, 45220, 45223, 45224, 45225, 45226, 45227, 45229, 45230, 
@@ -1,11 +1,14 @@
 import logging
 import time
 from selenium import webdriver
+from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import WebDriverException, TimeoutException
 from urllib.parse import urlparse
 
+from config import XPATHS
 from utils.form_helpers import safe_quit
+from utils.navigation import safe_click
 
 def is_valid_url(url):
     parsed = urlparse(url)
@@ -37,4 +40,87 @@ def init_driver(base_url, driver_type="firefox", max_retries=3, timeout=10):
     if driver:
         safe_quit(driver)
     logging.error(f"Failed to initialize WebDriver after {max_retries} attempts.")
-    raise WebDriverException(f"Failed to initialize WebDriver after {max_retries} attempts.")
\ No newline at end of file
+    raise WebDriverException(f"Failed to initialize WebDriver after {max_retries} attempts.")
+
+class BrowserSession:
+    """
+    Keeps one browser open across searches and restarts it only when it stops responding.
+
+    Parameters:
+    - base_url (str): Home page loaded when the browser starts.
+    - driver_type (str): "firefox" or "chrome". Default is "firefox".
+    - timeout (int): Explicit wait timeout in seconds. Default is 10.
+    """
+
+    def __init__(self, base_url, driver_type="firefox", timeout=10):
+        self.base_url = base_url
+        self.driver_type = driver_type
+        self.timeout = timeout
+        self.driver = None
+        self.wait = None
+        self.restarts = 0
+
+    def start(self):
+        self.driver, self.wait = init_driver(self.base_url, self.driver_type, timeout=self.timeout)
+
+    def restart(self):
+        logging.warning("Restarting the browser session.")
+        self.close()
+        self.start()
+        self.restarts += 1
+
+    def close(self):
+        if self.driver is not None:
+            safe_quit(self.driver)
+        self.driver = None
+        self.wait = None
+
+    def is_healthy(self):
+        """Checks that the browser still answers and its current page has finished loading."""
+        if self.driver is None:
+            return False
+        try:
+            return self.driver.execute_script("return document.readyState") == "complete"
+        except WebDriverException as e:
+            logging.warning(f"Browser session failed its health check: {e}")
+            return False
+
+    def new_search(self):
+        """
+        Gets the browser ready for the next search without restarting it when possible.
+
+        Clicks the "New Search" link of the current page, falls back to reloading the home page,
+        and only restarts the browser if it is unresponsive.
+
+        Returns:
+        - bool: True if the browser is on the search form, False if it is on the home page.
+        """
+        started = time.time()
+        if self.driver is None:
+            self.start()
+            return False
+        if not self.is_healthy():
+            self.restart()
+            return False
+
+        try:
+            # Checked without waiting, since the link is only on the property pages
+            if self.driver.find_elements(By.XPATH, XPATHS["property"]["new_search"]):
+                safe_click(self.wait, XPATHS["property"]["new_search"], retries=1, log=False)
+                logging.info(f"Returned to the search form in {time.time() - started:.1f}s.")
+                return True
+        except Exception as e:
+            logging.info(f"Could not use the New Search link: {e}")
+
+        try:
+            self.driver.get(self.base_url)
+        except WebDriverException as e:
+            logging.warning(f"Failed to reload {self.base_url}: {e}")
+            self.restart()
+        return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -5,112 +5,176 @@ def install_packages(requirements_file):
     subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", requirements_file])
 
 # Check and install requirements
-install_packages("requirements.txt")
+if __name__ == "__main__":
+    install_packages("requirements.txt")
 
 import time
 import pandas as pd
 from datetime import datetime
 import logging
 
-from config import BASE_URL
-from driver_setup import init_driver
+from config import BASE_URL, scraping_config
+from driver_setup import BrowserSession
 
 from utils.navigation import initialize_search, check_allowed_webscraping
-from utils.form_helpers import check_reset_needed, final_csv_conversion, safe_quit
-
-from scraper import scrape_data
-
-def main(allowed, start, end, dates, ids, values):
-    driver, wait = init_driver(BASE_URL)
+from utils.form_helpers import check_reset_needed, final_csv_conversion
+from utils.date_planning import SlicePlanner
+from utils.progress_journal import ProgressJournal
+from utils.homes_data import StoredTransfers
+from utils.homes_store import HomesStore
+from utils.homes_cube import HomesCube
+from utils.rate_limiting import AdaptiveRateLimiter
+
+from scraper import scrape_data, RESULTS_COLUMNS
+from scheduler import run_parallel
+
+def main(allowed, start, end, dates, ids, values, session, planner=None, journal=None, stored=None, throttle=None):
+    on_search_form = session.new_search()
+    driver, wait = session.driver, session.wait
     # Ensuring that webscraping on the website is allowed.
     if not allowed:
         allowed = check_allowed_webscraping(driver)
 
-    try:
-        initialize_search(wait, start, end, ids, values)
-        time.sleep(2)
-        reset_needed, modified, dates, NUM_ENTRIES = check_reset_needed(driver, wait, start, end, dates)
-        if reset_needed:
-            logging.info("Reset needed, closing WebDriver.")
-            return pd.DataFrame(), pd.DataFrame(), dates, driver, modified
-        # Scrape data
-        all_data, appraisal_data = scrape_data(driver, wait, NUM_ENTRIES)    
-        assert all_data, "No all_data returned!"
-        assert appraisal_data, "No appraisal_data returned!"            
-        # Consolidate data
-
-        if not all_data:
-            logging.error("No data scraped from the website.")
-            return pd.DataFrame(), pd.DataFrame(), dates, driver, modified
-        all_data_df = pd.concat(all_data).reset_index(drop=True)
-        all_data_df.columns = ['Parcel Number', 'Address', 'BBB', 'FinSqFt', 'Use', 'Year Built','Transfer Date', 'Amount']
-        appraisal_data_df = pd.concat(appraisal_data).reset_index(drop=True)
-        logging.info(f'Completed the main scraping of property data for {start_date} and {end_date}. Beginning address cleaning and converting to a csv file.')
-        return all_data_df, appraisal_data_df, dates, driver, modified
-    
-    finally:
-        safe_quit(driver)
-
-
-# Search parameters
-sale_price_low = int(input("What is the lowest price? "))
-sale_price_high = int(input("What is the highest price? "))
-finished_sq_ft_low = int(input("What is the lowest square feet? "))
-finished_sq_ft_high = int(input("What is the highest square feet? "))
-bedrooms_low = int(input("What is the lowest number of bedrooms? "))
-
-query_ids = ["sale_price_low","sale_price_high","finished_sq_ft_low","finished_sq_ft_high","bedrooms_low"]
-query_values = [sale_price_low, sale_price_high, finished_sq_ft_low, finished_sq_ft_high, bedrooms_low]
-
-# Define years to process
-start_year = input("What year do you want to start the search? ")
-end_year = input("What year do you want to end the search? ")
-years = range(int(start_year), int(end_year)+1)
-
-# Set up the root logger
-logging.basicConfig(
-    filename="scraper.log",
-    filemode="a",  # Append mode
-    level=logging.INFO,  # Minimum log level for messages to be recorded
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
-allowed = False
-
-# Main loop to process each year
-for YEAR in years:
-    start = datetime.strptime(f"01/01/{YEAR}", "%m/%d/%Y")
-    end = datetime.strptime(f"12/31/{YEAR}", "%m/%d/%Y")
+    initialize_search(wait, start, end, ids, values, from_home=not on_search_form)
+    time.sleep(2)
+    reset_needed, modified, dates, NUM_ENTRIES = check_reset_needed(driver, wait, start, end, dates)
+    if planner is not None:
+        planner.observe(start, end, NUM_ENTRIES)
+    if reset_needed:
+        logging.info("Reset needed, starting a new search.")
+        return pd.DataFrame(), pd.DataFrame(), dates, driver, modified
+    if NUM_ENTRIES < 1:
+        return pd.DataFrame(), pd.DataFrame(), dates, driver, modified
+    # Scrape data
+    checkpoint = journal.checkpoint(start, end) if journal is not None else None
+    all_data, appraisal_data = scrape_data(driver, wait, NUM_ENTRIES, throttle, checkpoint=checkpoint, stored=stored)
+    if stored is not None and not all_data:
+        logging.info(f"Every transfer between {start} and {end} is already stored.")
+        return pd.DataFrame(), pd.DataFrame(), dates, driver, modified
+    assert all_data, "No all_data returned!"
+    assert appraisal_data, "No appraisal_data returned!"            
+    # Consolidate data
+
+    if not all_data:
+        logging.error("No data scraped from the website.")
+        return pd.DataFrame(), pd.DataFrame(), dates, driver, modified
+    all_data_df = pd.concat(all_data).reset_index(drop=True)
+    all_data_df.columns = RESULTS_COLUMNS
+    appraisal_data_df = pd.concat(appraisal_data).reset_index(drop=True)
+    logging.info(f'Completed the main scraping of property data for {start_date} and {end_date}. Beginning address cleaning and converting to a csv file.')
+    return all_data_df, appraisal_data_df, dates, driver, modified
+
+
+if __name__ == "__main__":
+    # Search parameters
+    sale_price_low = int(input("What is the lowest price? "))
+    sale_price_high = int(input("What is the highest price? "))
+    finished_sq_ft_low = int(input("What is the lowest square feet? "))
+    finished_sq_ft_high = int(input("What is the highest square feet? "))
+    bedrooms_low = int(input("What is the lowest number of bedrooms? "))
+
+    query_ids = ["sale_price_low","sale_price_high","finished_sq_ft_low","finished_sq_ft_high","bedrooms_low"]
+    query_values = [sale_price_low, sale_price_high, finished_sq_ft_low, finished_sq_ft_high, bedrooms_low]
+
+    # Define years to process
+    start_year = input("What year do you want to start the search? ")
+    end_year = input("What year do you want to end the search? ")
+    years = range(int(start_year), int(end_year)+1)
+    workers = int(input("How many browsers should scrape in parallel? ") or 1)
+    incremental = input("Only scrape transfers that are not saved yet? (y/n) ").strip().lower() == "y"
+
+    # Set up the root logger
+    logging.basicConfig(
+        filename="scraper.log",
+        filemode="a",  # Append mode
+        level=logging.INFO,  # Minimum log level for messages to be recorded
+        format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    allowed = False
+
+    store = HomesStore()
+    if not store.partitions():
+        logging.warning(f"No homes found in {store.root}. Run `python -m utils.homes_store` to migrate the homes CSVs.")
+    # Cut each year into slices expected to stay under the results cap
+    planner = SlicePlanner.from_store(store)
+    # In incremental mode only new or changed transfers have their detail pages visited
+    stored = StoredTransfers.from_store(store) if incremental else None
+
+    if workers > 1:
+        run_parallel(
+            years, query_ids, query_values, workers,
+            planner=planner, journal_path=scraping_config["journal_path"], stored=stored
+        )
+    else:
+        # One browser is kept open for every search and only restarted if it stops responding
+        session = BrowserSession(BASE_URL)
+        # Slices finished by an earlier run are skipped and an interrupted slice is resumed
+        journal = ProgressJournal(scraping_config["journal_path"], dict(zip(query_ids, query_values)))
+        # The pace between page loads adapts to the site's response times across every search
+        throttle = AdaptiveRateLimiter.from_config(scraping_config)
+        try:
+            # Main loop to process each year
+            for YEAR in years:
+                start = datetime.strptime(f"01/01/{YEAR}", "%m/%d/%Y")
+                end = datetime.strptime(f"12/31/{YEAR}", "%m/%d/%Y")
     
-    start_date = f"{start:%m/%d/%Y}"
-    end_date = f"{end:%m/%d/%Y}"
-    dates = [(start_date, end_date)]
-
-    if __name__ == "__main__":
-        logging.info(f"Starting scraping process for year {YEAR}")
-
-        while dates:
-            logging.info(f"Starting scraping process for start date, {start_date}, and end date, {end_date}")
-            for start_date, end_date in dates[:]:
-
-                # Initialize empty DataFrames for each set of dates
-                all_data_df = pd.DataFrame()
-                appraisal_data_df = pd.DataFrame()
-
-                # Call main function with the full date range for the year
-                all_data, appraisal_data, dates, driver, modified = main(
-                    allowed=allowed,
-                    start=start_date,
-                    end=end_date,
-                    ids=query_ids,
-                    values=query_values,
-                    dates=dates
-                )
-                if modified:
-                    break
-
-                # Concatenate data
-                all_data_df = pd.concat([all_data_df, all_data], axis=0, ignore_index=True)
-                appraisal_data_df = pd.concat([appraisal_data_df, appraisal_data], axis=0, ignore_index=True)
-
-                # Final data processing and saving
-                final_csv_conversion(all_data_df, appraisal_data_df, dates, start_date, end_date, YEAR)
\ No newline at end of file
+                start_date = f"{start:%m/%d/%Y}"
+                end_date = f"{end:%m/%d/%Y}"
+                dates = journal.remaining_slices(start_date, end_date, planner)
+                # Slices tried in this run, so one left open by failed properties is not retried until the next run
+                attempted = set()
+
+                logging.info(f"Starting scraping process for year {YEAR}")
+
+                while dates:
+                    logging.info(f"Starting scraping process for start date, {start_date}, and end date, {end_date}")
+                    for start_date, end_date in dates[:]:
+
+                        # Initialize empty DataFrames for each set of dates
+                        all_data_df = pd.DataFrame()
+                        appraisal_data_df = pd.DataFrame()
+
+                        # Call main function with the full date range for the year
+                        all_data, appraisal_data, dates, driver, modified = main(
+                            allowed=allowed,
+                            start=start_date,
+                            end=end_date,
+                            ids=query_ids,
+                            values=query_values,
+                            dates=dates,
+                            session=session,
+                            planner=planner,
+                            journal=journal,
+                            stored=stored,
+                            throttle=throttle
+                        )
+                        if modified:
+                            break
+                        attempted.add((start_date, end_date))
+
+                        if not appraisal_data.empty:
+                            # Concatenate data
+                            all_data_df = pd.concat([all_data_df, all_data], axis=0, ignore_index=True)
+                            appraisal_data_df = pd.concat([appraisal_data_df, appraisal_data], axis=0, ignore_index=True)
+
+                            # Final data processing and saving
+                            final_csv_conversion(all_data_df, appraisal_data_df, dates, start_date, end_date, store=store)
+
+                        # A slice with properties whose details failed stays open, so the next run scrapes it again
+                        missing = len(all_data) - len(appraisal_data)
+                        if missing > 0:
+                            logging.warning(f"{missing} properties between {start_date} and {end_date} have no details. Leaving the slice open for the next run.")
+                        else:
+                            journal.checkpoint(start_date, end_date).finish()
+
+                        # Re-plan the rest of the year with the counts seen so far, skipping finished
+                        # slices and keeping the boundaries of interrupted ones
+                        remaining = journal.remaining_slices(f"01/01/{YEAR}", f"12/31/{YEAR}", planner)
+                        dates = [dates_slice for dates_slice in remaining if dates_slice not in attempted]
+                        break
+        finally:
+            session.close()
+            journal.close()
+
+    # Refresh the dashboard statistics of the scraped years
+    HomesCube(store=store).refresh(years)
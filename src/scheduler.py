@@ -0,0 +1,254 @@
+import os
+import glob
+import time
+import shutil
+import logging
+import multiprocessing
+import pandas as pd
+from datetime import datetime
+
+from config import BASE_URL, RETRY_LIMIT, logging_config, scraping_config
+from driver_setup import BrowserSession
+
+from utils.navigation import initialize_search, check_allowed_webscraping
+from utils.form_helpers import get_num_entries, process_home_data, save_to_csv
+from utils.date_planning import split_date_range
+from utils.rate_limiting import SharedRateLimiter
+from utils.progress_journal import ProgressJournal
+from utils.homes_store import HomesStore
+from utils.sale_index import SaleIndex
+
+from scraper import scrape_data, RESULTS_COLUMNS
+
+def year_slices(years, planner=None, journal=None):
+    """
+    Returns the (year, start, end) work items covering each year: the slices planned by
+    `planner` when one is given, otherwise one slice per whole year. With a `journal`, slices
+    finished by an earlier run are left out.
+    """
+    if journal is not None:
+        return [
+            (year, start, end)
+            for year in years
+            for start, end in journal.remaining_slices(f"01/01/{year}", f"12/31/{year}", planner)
+        ]
+    if planner is None:
+        return [(year, f"01/01/{year}", f"12/31/{year}") for year in years]
+    return [(year, start, end) for year in years for start, end in planner.plan_year(year)]
+
+def scrape_slice(session, start, end, ids, values, rate_limiter=None, checkpoint=None, stored=None):
+    """
+    Runs one search on an open browser and scrapes every result.
+
+    Parameters:
+    - session (BrowserSession): The worker's long-lived browser session.
+    - start (str): Start date of the search (MM/DD/YYYY).
+    - end (str): End date of the search (MM/DD/YYYY).
+    - ids (list of str): Form field IDs of the search filters.
+    - values (list): Values of the search filters.
+    - rate_limiter: Optional limiter passed on to `scrape_data`.
+    - checkpoint (SliceCheckpoint): Optional progress journal entry passed on to `scrape_data`.
+    - stored (StoredTransfers): Optional index of saved transfers passed on to `scrape_data`.
+
+    Returns:
+    - tuple: ("split", (first_half, second_half)) when the search hit the results cap,
+      ("empty", None) when it found nothing, ("done", DataFrame) with the processed homes, or
+      ("partial", DataFrame) when some properties have no details. The frame is None if none do.
+    """
+    on_search_form = session.new_search()
+    driver, wait = session.driver, session.wait
+    initialize_search(wait, start, end, ids, values, from_home=not on_search_form)
+    time.sleep(2)
+
+    num_entries = get_num_entries(driver, wait)
+    if num_entries >= scraping_config["max_entries_per_page"]:
+        logging.info(f"Entries = {num_entries} for {start} to {end}. Splitting the slice.")
+        return "split", split_date_range(start, end)
+    if num_entries < 1:
+        logging.warning(f"Search parameters between {start} and {end} yielded no results.")
+        return "empty", None
+
+    all_data, appraisal_data = scrape_data(driver, wait, num_entries, rate_limiter, checkpoint, stored)
+    if stored is not None and not all_data:
+        logging.info(f"Every transfer between {start} and {end} is already stored.")
+        return "empty", None
+    if not all_data:
+        logging.error(f"No data scraped for {start} to {end}.")
+        return "empty", None
+
+    all_data_df = pd.concat(all_data).reset_index(drop=True)
+    all_data_df.columns = RESULTS_COLUMNS
+    missing = len(all_data_df) - len(appraisal_data)
+    if missing > 0:
+        logging.warning(f"{missing} properties between {start} and {end} have no details.")
+    if not appraisal_data:
+        return "partial", None
+    appraisal_data_df = pd.concat(appraisal_data).reset_index(drop=True)
+    return "partial" if missing > 0 else "done", process_home_data(all_data_df, appraisal_data_df)
+
+def _adjust_pending(pending, amount):
+    with pending.get_lock():
+        pending.value += amount
+
+def scrape_worker(worker_id, work_queue, pending, rate_limiter, ids, values, shard_dir, journal_path=None, stored=None):
+    """
+    Worker process: keeps one browser session open and scrapes date slices from the shared queue
+    until it receives None. The browser is only restarted when it stops responding. Slices over
+    the results cap are split and put back on the queue.
+
+    Each worker appends its homes to its own shard, `{shard_dir}/worker-{id}/{year} Homes.csv`,
+    skipping sales already in the shard's `SaleIndex`, so a retried slice is not appended twice.
+    The index only covers this run's shard; changed transfers from earlier runs are saved again
+    and upserted when the shards are merged. With a `journal_path`, progress is checkpointed and
+    each slice is marked done once its shard is saved. With `stored`, only transfers missing from
+    the index are scraped.
+    """
+    logging.basicConfig(
+        filename=logging_config["filename"],
+        filemode="a",
+        level=logging_config["level"],
+        format=f"%(asctime)s - worker-{worker_id} - %(levelname)s - %(message)s",
+    )
+    worker_dir = os.path.join(shard_dir, f"worker-{worker_id}")
+    os.makedirs(worker_dir, exist_ok=True)
+    # A retried slice must not append its sales to the shard twice
+    sale_index = SaleIndex(os.path.join(worker_dir, "sales.sqlite"))
+
+    journal = ProgressJournal(journal_path, dict(zip(ids, values))) if journal_path else None
+    session = BrowserSession(BASE_URL)
+    try:
+        session.start()
+        if not check_allowed_webscraping(session.driver):
+            return
+
+        while True:
+            task = work_queue.get()
+            if task is None:
+                break
+            year, start, end, attempt = task
+            try:
+                logging.info(f"Scraping {start} to {end} (attempt {attempt + 1}).")
+                checkpoint = journal.checkpoint(start, end) if journal is not None else None
+                status, payload = scrape_slice(session, start, end, ids, values, rate_limiter, checkpoint, stored)
+                if status == "split":
+                    _adjust_pending(pending, len(payload))
+                    for half_start, half_end in payload:
+                        work_queue.put((year, half_start, half_end, 0))
+                    continue
+                if payload is not None:
+                    homes = sale_index.filter_new(payload)
+                    save_to_csv(homes, os.path.join(worker_dir, f"{year} Homes.csv"))
+                    # Recorded only once the shard has them
+                    sale_index.add(homes)
+                # A slice with failed properties stays open, so the next run scrapes it again
+                if checkpoint is not None and status != "partial":
+                    checkpoint.finish()
+            except Exception as e:
+                logging.error(f"Failed to scrape {start} to {end}: {e}")
+                if attempt + 1 < RETRY_LIMIT:
+                    _adjust_pending(pending, 1)
+                    work_queue.put((year, start, end, attempt + 1))
+            finally:
+                _adjust_pending(pending, -1)
+    finally:
+        session.close()
+        sale_index.close()
+        if journal is not None:
+            journal.close()
+
+def merge_shards(shard_dir, store=None):
+    """
+    Upserts the per-worker shards into the homes Parquet dataset, then removes them.
+
+    Parameters:
+    - shard_dir (str): Folder of the run's shards.
+    - store (HomesStore): Dataset to write to. Defaults to `HomesStore()`.
+
+    Returns:
+    - dict: Number of rows saved per year.
+    """
+    store = store or HomesStore()
+    shards = {}
+    for path in glob.glob(os.path.join(shard_dir, "worker-*", "* Homes.csv")):
+        year = os.path.basename(path).split(" ")[0]
+        shards.setdefault(year, []).append(path)
+
+    saved = {}
+    for year, paths in sorted(shards.items()):
+        year_df = pd.concat([pd.read_csv(path, dtype=str) for path in paths])
+        saved[year] = store.upsert(year_df)["rows"]
+
+    shutil.rmtree(shard_dir, ignore_errors=True)
+    return saved
+
+def run_parallel(years, ids, values, workers, requests_per_minute=None, poll_interval=5, planner=None, journal_path=None, stored=None):
+    """
+    Scrapes the given years with a pool of browser processes sharing one work queue and one
+    politeness budget, then merges their results.
+
+    Parameters:
+    - years (iterable of int): Years to scrape.
+    - ids (list of str): Form field IDs of the search filters.
+    - values (list): Values of the search filters.
+    - workers (int): Number of browser processes.
+    - requests_per_minute (float): Total page loads per minute across all workers. Defaults to
+      `scraping_config["politeness_requests_per_minute"]`, the same ceiling a single adaptive
+      browser runs under, so the pool is never capped below sequential scraping.
+    - poll_interval (float): Seconds between checks on the workers. Default is 5.
+    - planner (SlicePlanner): Optional planner used to cut the years into slices up front.
+    - journal_path (str): Optional progress journal. Finished slices are skipped and interrupted
+      ones resume where they stopped. Shards left behind by an interrupted run are always merged first.
+    - stored (StoredTransfers): Optional index of saved transfers. Only new or changed transfers are scraped.
+
+    Returns:
+    - dict: Number of rows saved per year.
+    """
+    context = multiprocessing.get_context("spawn")
+    work_queue = context.Queue()
+    pending = context.Value("i", 0)
+    rate_limiter = SharedRateLimiter(
+        (requests_per_minute or scraping_config["politeness_requests_per_minute"]) / 60, context
+    )
+    shard_dir = os.path.join(scraping_config["shard_dir"], f"{datetime.now():%Y%m%d%H%M%S}")
+
+    # Homes in shards left by an interrupted run are merged first, since their slices may already
+    # be marked done. Merging is an upsert, so sales scraped again in this run are not duplicated.
+    for leftover_dir in sorted(glob.glob(os.path.join(scraping_config["shard_dir"], "*"))):
+        logging.info(f"Merging shards left by an earlier run in {leftover_dir}.")
+        merge_shards(leftover_dir)
+
+    journal = None
+    if journal_path:
+        journal = ProgressJournal(journal_path, dict(zip(ids, values)))
+
+    slices = year_slices(years, planner, journal)
+    if journal is not None:
+        journal.close()
+    _adjust_pending(pending, len(slices))
+    for year, start, end in slices:
+        work_queue.put((year, start, end, 0))
+
+    processes = [
+        context.Process(
+            target=scrape_worker,
+            args=(worker_id, work_queue, pending, rate_limiter, ids, values, shard_dir, journal_path, stored),
+            name=f"worker-{worker_id}",
+        )
+        for worker_id in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    logging.info(f"Started {workers} scraping workers for {len(slices)} slices.")
+
+    while pending.value > 0:
+        if not any(process.is_alive() for process in processes):
+            logging.error(f"All workers stopped with {pending.value} slices left.")
+            break
+        time.sleep(poll_interval)
+
+    for _ in processes:
+        work_queue.put(None)
+    for process in processes:
+        process.join()
+
+    return merge_shards(shard_dir)
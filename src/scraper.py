@@ -1,19 +1,30 @@
 import time
 import logging
-import random 
 import pandas as pd
 import numpy as np
 
-from config import XPATHS
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+from config import XPATHS, scraping_config
 
 from utils.form_helpers import get_text
-from utils.table_extraction import scrape_table_by_xpath, transform_table, find_click_row
-from utils.navigation import safe_click, next_navigation
+from utils.table_extraction import scrape_table_by_xpath, find_click_row
+from utils.detail_fetch import parse_property_page, session_from_driver, fetch_property_details
+from utils.navigation import safe_click, next_navigation, return_to_results, show_all_results
+from utils.rate_limiting import AdaptiveRateLimiter
+
+RESULTS_COLUMNS = ['Parcel Number', 'Address', 'BBB', 'FinSqFt', 'Use', 'Year Built','Transfer Date', 'Amount']
+RESULTS_DTYPES = {'FinSqFt': 'Int64', 'Use': 'Int64', 'Year Built': 'Int64'}
 
 def extract_property_details(driver, wait):
     """
     Extracts detailed property information, including appraisal, tax, and transfer data.
 
+    The page is read from the browser once, after the appraisal table has loaded, and every field
+    is then located in that snapshot with lxml, see `parse_property_page`.
+
     Parameters:
     - wait (WebDriverWait): Selenium WebDriverWait instance for handling explicit waits.
 
@@ -21,97 +32,169 @@ def extract_property_details(driver, wait):
     - pd.DataFrame: DataFrame containing property details, or None if an error occurs.
     """
     try:
-        # Retrieve and process the parcel ID
-        parcel_text = get_text(driver, wait, XPATHS["property"]["parcel_id"])
-        parcel_parts = parcel_text.split("\n")
-        if len(parcel_parts) < 2 or not parcel_parts[1].strip():
-            logging.warning(f"Unexpected format for parcel_id: {parcel_text}")
-            return None
-        parcel_id = parcel_parts[1].strip()
-
-        # Scrape and transform the appraisal table
-        appraisal_table = scrape_table_by_xpath(wait, XPATHS["view"]["appraisal_information"])
-
-        if appraisal_table is None or appraisal_table.empty:
-            logging.warning(f"Appraisal table is empty for parcel {parcel_id}.")
-            return None
-        appraisal_table = transform_table(appraisal_table)
-        # Drop unwanted columns
-        columns_to_drop = ["Year Built", "Deed Number", "# of Parcels Sold"]
-        appraisal_table = appraisal_table.drop(
-            [col for col in columns_to_drop if col in appraisal_table.columns], axis=1
-        )
-
-        # Rename columns
-        appraisal_table.rename(
-            columns={
-                "# Bedrooms": "Bedrooms",
-                "# Full Bathrooms": "Full Baths",
-                "# Half Bathrooms": "Half Baths"
-            }, inplace=True
-        )
-
-        # Add additional property details
-        appraisal_table["parcel_id"] = parcel_id
-        appraisal_table["school_district"] = get_text(driver, wait, XPATHS["property"]["school_district"])
-        appraisal_table["owner_address"] = get_text(driver, wait, XPATHS["property"]["owner"])
-
-        return appraisal_table
+        wait.until(EC.presence_of_element_located((By.XPATH, XPATHS["view"]["appraisal_information"])))
+        return parse_property_page(driver.page_source)
 
+    except TimeoutException as e:
+        logging.warning(f"Appraisal table did not load: {e}")
+        return None
     except Exception as e:
-        logging.error(f"Error extracting details for parcel {parcel_id if 'parcel_id' in locals() else 'unknown'}: {e}")
+        logging.error(f"Error extracting property details: {e}")
         return None
 
     
 def scrape_results_page(wait):
     """Scrapes the results page for the main table."""
     try:
-        table = scrape_table_by_xpath(wait, XPATHS["results"]["results_table"])
+        table = scrape_table_by_xpath(
+            wait, XPATHS["results"]["results_table"], columns=RESULTS_COLUMNS, dtypes=RESULTS_DTYPES
+        )
         return table
     except Exception as e:
         logging.error(f"Error scraping results page: {e}")
         return pd.DataFrame()
 
-def scrape_data(driver, wait, NUM_ENTRIES):
+def open_result_row(driver, wait, position, page_size, rate_limiter, num_entries=None):
     """
-    Handles data scraping, including navigating pages and extracting details.
+    Opens the property details of one row of the results table, counting from 0 across all pages.
+    When one page held all `num_entries` results, the table is expanded to show them all again.
     """
-    all_data, appraisal_data = [], []
-    PAGE_NUMBER = pd.to_numeric(get_text(driver, wait, XPATHS["results"]["number_pages"]))
-
-    for i in range(PAGE_NUMBER):
-        logging.info(f"Scraping results on page {i+1}...")
-        results_data = scrape_results_page(wait)
-        
-        if results_data is not None and not results_data.empty:
-            all_data.append(results_data)
-
-        else:
-            logging.warning(f"No data found on page {i+1}. Ending scrape.")
-            break
+    page, row = divmod(position, page_size)
+    if num_entries is not None and page_size >= num_entries:
+        show_all_results(driver, wait, num_entries)
+    else:
+        safe_click(wait, XPATHS["results"]["first_results_table_page"])
+    for _ in range(page):
+        rate_limiter.acquire()
+        next_navigation(driver, wait, XPATHS["results"]["next_page_button"])
+    find_click_row(driver, wait, XPATHS["results"]["results_table_row"].format(row=row + 1))
 
-        if not next_navigation(driver, wait, XPATHS["results"]["next_page_button"]):
-            break
+def scrape_data(driver, wait, NUM_ENTRIES, rate_limiter=None, checkpoint=None, stored=None):
+    """
+    Handles data scraping, including navigating pages and extracting details.
 
-    # Navigate to the first property details page
+    Parameters:
+    - rate_limiter: Optional limiter whose `acquire` is called before every page navigation, e.g. a
+      `SharedRateLimiter` for a pool of browsers. Each page load is reported back with `record`.
+      Defaults to an `AdaptiveRateLimiter` built from `scraping_config`, which speeds up while the
+      site answers quickly and backs off on slow or failed pages. Pass one limiter to every call
+      to keep its rate across searches.
+    - checkpoint (SliceCheckpoint): Optional progress journal entry for this search. Results pages
+      and property details are saved as they are scraped, and a search that was interrupted
+      resumes at the first property whose details are missing.
+    - stored (StoredTransfers): Optional index of transfers already saved. Only the details of new or
+      changed transfers are scraped, and only their results rows are returned.
+
+    With `scraping_config["fetch_details_over_http"]`, property pages are requested directly with the
+    browser's cookies instead of being clicked through, see `fetch_property_details`.
+    """
+    throttle = rate_limiter if rate_limiter is not None else AdaptiveRateLimiter.from_config(scraping_config)
+    all_data = checkpoint.results_pages() if checkpoint is not None else None
     if all_data:
-        safe_click(wait, XPATHS["results"]["first_results_table_page"])
-        find_click_row(driver, wait, XPATHS["results"]["first_row_results_table"])
+        logging.info(f"Loaded {len(all_data)} results pages from the progress journal.")
     else:
+        all_data = []
+        if checkpoint is not None:
+            checkpoint.begin(NUM_ENTRIES)
+        # Show every result on one page when the table allows it, otherwise page through them
+        show_all = scraping_config["results_show_all"] and show_all_results(driver, wait, NUM_ENTRIES)
+        PAGE_NUMBER = 1 if show_all else pd.to_numeric(get_text(driver, wait, XPATHS["results"]["number_pages"]))
+
+        page_start = time.monotonic()
+        for i in range(PAGE_NUMBER):
+            logging.info(f"Scraping results on page {i+1}...")
+            results_data = scrape_results_page(wait)
+            found = results_data is not None and not results_data.empty
+            if i > 0:
+                throttle.record(time.monotonic() - page_start, ok=found)
+            
+            if found:
+                all_data.append(results_data)
+
+            else:
+                logging.warning(f"No data found on page {i+1}. Ending scrape.")
+                break
+
+            if i + 1 == PAGE_NUMBER:
+                break
+            throttle.acquire()
+            page_start = time.monotonic()
+            if not next_navigation(driver, wait, XPATHS["results"]["next_page_button"]):
+                break
+
+        if checkpoint is not None and all_data:
+            checkpoint.save_results_pages(all_data)
+
+    if not all_data:
         logging.warning("No all_data to navigate for property details.")
+        return all_data, []
+
+    # Work out which properties still need their details scraped
+    page_size = len(all_data[0])
+    results = pd.concat(all_data).reset_index(drop=True)
+    # The results can hold fewer rows than the search reported, so positions come from the table
+    wanted = [True] * len(results)
+    if stored is not None:
+        wanted = stored.is_new(results.set_axis(RESULTS_COLUMNS, axis=1))
+        logging.info(f"{sum(wanted)} of {len(wanted)} transfers are not stored yet.")
+        all_data = [results[wanted]] if any(wanted) else []
+    saved_details = checkpoint.property_details() if checkpoint is not None else {}
+    positions = [i for i in range(len(wanted)) if wanted[i] and i not in saved_details]
+    if positions and positions[0] > 0:
+        logging.info(f"Starting at property {positions[0]+1} of {NUM_ENTRIES}.")
+
+    # Request the property pages directly, in batches so the journal keeps up
+    if positions and scraping_config["fetch_details_over_http"]:
+        session = session_from_driver(driver)
+        batch_size = scraping_config["detail_fetch_batch_size"]
+        for batch_start in range(0, len(positions), batch_size):
+            batch = positions[batch_start:batch_start + batch_size]
+            logging.info(f"Fetching property details for properties {batch[0]+1} to {batch[-1]+1} of {NUM_ENTRIES}...")
+            details = fetch_property_details(results.iloc[batch, 0].tolist(), session, rate_limiter=rate_limiter)
+            for i, appraisal_table in zip(batch, details):
+                saved_details[i] = appraisal_table
+                if checkpoint is not None:
+                    checkpoint.save_property_details(i, appraisal_table)
+        session.close()
+        positions = []
+
+    # Scrape property details. Consecutive properties are reached with the Next button, and the
+    # results table is used to jump over properties that are not needed.
+    current = None
+    # Pages opened since the results table, so going back lands on the table again
+    depth = 0
+    for i in positions:
+        throttle.acquire()
+        page_start = time.monotonic()
+        if current is None:
+            open_result_row(driver, wait, i, page_size, throttle, NUM_ENTRIES)
+            depth = 1
+        elif i == current + 1:
+            if not next_navigation(driver, wait, XPATHS["property"]["next_property"]):
+                break
+            depth += 1
+        else:
+            if not return_to_results(driver, wait, depth):
+                # The properties left are retried when the slice is resumed
+                logging.error(f"Could not return to the results table. Stopping at property {i+1} of {NUM_ENTRIES}.")
+                break
+            open_result_row(driver, wait, i, page_size, throttle, NUM_ENTRIES)
+            depth = 1
+        current = i
 
-    # Scrape property details
-    for i in range(NUM_ENTRIES):
         logging.info(f"Scraping property details for property({i+1} of {NUM_ENTRIES})...")
         appraisal_table = extract_property_details(driver, wait)
-        if appraisal_table is not None:
-            appraisal_data.append(appraisal_table)
-        else:
+        throttle.record(time.monotonic() - page_start, ok=appraisal_table is not None)
+        if appraisal_table is None:
             logging.info("Failed to extract property details.")
-
-        time.sleep(random.uniform(5, 8))
-
-        if not next_navigation(driver, wait, XPATHS["property"]["next_property"]):
-            break
-
+        saved_details[i] = appraisal_table
+        if checkpoint is not None:
+            checkpoint.save_property_details(i, appraisal_table)
+
+    if isinstance(throttle, AdaptiveRateLimiter):
+        throttle.log_metrics()
+    appraisal_data = [
+        saved_details[i] for i in sorted(saved_details)
+        if i < len(wanted) and wanted[i] and saved_details[i] is not None
+    ]
     return all_data, appraisal_data
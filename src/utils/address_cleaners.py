@@ -1,59 +1,207 @@
 import re
 import pandas as pd
-import difflib
 import spacy
 
+from config import street_type_map, school_city_map
+from utils.street_index import StreetNameIndex
+
 def is_alphanumeric(token):
     """Check if the token text is alphanumeric."""
     return re.match("^(?=.*[0-9])(?=.*[a-zA-Z])[a-zA-Z0-9]+$", token.text) is not None
 
+# Last street vocabulary passed as a list to `correct_street_name_fuzzy`, its length and its index
+_street_index = (None, 0, None)
+
 def correct_street_name_fuzzy(street_name, valid_names, cutoff=0.8):
-    matches = difflib.get_close_matches(street_name, valid_names, n=1, cutoff=cutoff)
-    return matches[0] if matches else street_name
+    """
+    Replaces a street name with the closest valid name, scored with `difflib.SequenceMatcher`
+    ratios through a `StreetNameIndex`.
+
+    Parameters:
+    - street_name (str): The name to correct.
+    - valid_names (StreetNameIndex or list of str): The street vocabulary. Build the index once
+      where the vocabulary is loaded and pass it in. A list is indexed on first use and the index
+      is reused while the same list object with the same length is passed, so edit a list in
+      place only by adding or removing names, or pass a new list.
+    - cutoff (float): Lowest similarity ratio accepted. Default is 0.8.
+
+    Returns:
+    - str: The closest valid name, or `street_name` if none is close enough.
+    """
+    global _street_index
+    if isinstance(valid_names, StreetNameIndex):
+        index = valid_names
+    else:
+        indexed_names, length, index = _street_index
+        if indexed_names is not valid_names or length != len(valid_names):
+            index = StreetNameIndex(valid_names)
+            _street_index = (valid_names, len(valid_names), index)
+    match = index.best_match(street_name, cutoff)
+    return match if match is not None else street_name
+
+def normalize_street(street):
+    """
+    Upper-cases a street name and expands abbreviated street types with `street_type_map`,
+    so "Fieldstone Dr" and "FIELDSTONE DRIVE" compare equal.
+    """
+    if not isinstance(street, str):
+        return None
+    return " ".join(street_type_map.get(word, word) for word in street.upper().split())
+
+# Owner name and street on the first line(s), then "CITY ST 12345"
+OWNER_ADDRESS_PATTERN = (
+    r"(?P<owner_street_address>.+?)\r?\n(?P<owner_city>[A-Z\s]+) "
+    r"(?P<owner_state>[A-Z]{2}) (?P<owner_postal_code>\d{5})"
+)
+FIRST_WORD_PATTERN = r"^\s*(\S+)"
+STREET_TYPE_PATTERN = re.compile(r"\b(" + "|".join(map(re.escape, street_type_map)) + r")\b")
+
+def expand_street_types(addresses):
+    """
+    Replaces abbreviated street types in a column of addresses with `street_type_map`, e.g. "DR" with "DRIVE".
+
+    Every abbreviation is matched by one alternation in a single pass over the column.
+    """
+    return addresses.str.replace(STREET_TYPE_PATTERN, lambda match: street_type_map[match.group(0)], regex=True)
 
 def owner_address_cleaner(df):
-    # Regex pattern to extract address, city, state, and postal code
-    pattern = r"(?P<address>.+?)\r?\n(?P<city>[A-Z\s]+) (?P<state>[A-Z]{2}) (?P<postal_code>\d{5})"
+    """
+    Splits `owner_address` into street, city, state and postal code, and flags owners whose
+    street address starts with the same word (the house number) as the property's address.
 
-    # Getting the details using regex
-    extracted_data = df["owner_address"].str.extract(pattern)
+    Returns:
+    - pd.DataFrame: `df` with the owner columns and `owner_home_address_match` ("Y" or "N") added.
+    """
+    owner = df["owner_address"].astype("string").str.extract(OWNER_ADDRESS_PATTERN)
+    site_number = df["address"].astype("string").str.extract(FIRST_WORD_PATTERN, expand=False)
+    owner_number = owner["owner_street_address"].str.extract(FIRST_WORD_PATTERN, expand=False)
+    match = (site_number == owner_number).fillna(False)
+    return df.assign(**owner, owner_home_address_match=match.map({True: "Y", False: "N"}))
 
-    # Replacing the columns with more descriptive names
-    extracted_data.columns = ["owner_street_address", "owner_city", "owner_state", "owner_postal_code"]
+# List of spelled-out numbers to exclude from being tagged as 'NUM'
+SPELLED_OUT_NUMBERS = {
+    "zero", "one", "two", "three", "four", "five", "six", "seven",
+    "eight", "nine", "ten", "eleven", "twelve", "thirteen",
+    "fourteen", "fifteen", "sixteen", "seventeen", "eighteen",
+    "nineteen", "twenty"
+}
 
-    # Joining data back
-    df = pd.concat([df,extracted_data],axis=1)
-    df.loc[df["address"].str.split(expand=True)[0]==df["owner_street_address"].str.split(expand=True)[0],"owner_home_address_match"] = "Y"
-    df.loc[df["owner_home_address_match"]!="Y","owner_home_address_match"] = "N"
-    return df
+# Only the tagger is needed for the 'NUM' checks, so the rest of the pipeline is skipped.
+SPACY_MODEL = "en_core_web_sm"
+SPACY_DISABLED_COMPONENTS = ["parser", "ner", "lemmatizer"]
 
-def tag_address(address):
+_nlp = None
+
+# Common "<number> [<unit>] <street words>" addresses, e.g. "6527 COFFEY STREET" or "2700 34 ASHLAND AVE".
+# The unit is either all digits or a mix of digits and letters, matching the spaCy rules in `_tag_doc`.
+# Anything with punctuation or digits in the street is left to spaCy.
+SIMPLE_ADDRESS_PATTERN = re.compile(
+    r"^(?P<st_num>\d+)"
+    r"(?: (?P<apt_num>\d+|(?=[A-Z0-9]*[0-9])(?=[A-Z0-9]*[A-Z])[A-Z0-9]+))?"
+    r" (?P<street>[A-Z]+(?: [A-Z]+)*)$",
+    re.IGNORECASE,
+)
+
+def get_nlp():
     """
-    Tag the components of the address using the defined pattern.
-    Returns a dictionary with the components tagged.
-    """
-    # List of spelled-out numbers to exclude from being tagged as 'NUM'
-    spelled_out_numbers = {
-        "zero", "one", "two", "three", "four", "five", "six", "seven", 
-        "eight", "nine", "ten", "eleven", "twelve", "thirteen", 
-        "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", 
-        "nineteen", "twenty"
-    }    
-    # Initialize the spaCy model and Matcher
-    nlp = spacy.load("en_core_web_sm")
-    doc = nlp(address)
+    Loads the spaCy pipeline the first time it is needed and reuses it afterwards.
+
+    Returns:
+    - spacy.language.Language: The shared pipeline with the unused components disabled.
+    """
+    global _nlp
+    if _nlp is None:
+        _nlp = spacy.load(SPACY_MODEL, disable=SPACY_DISABLED_COMPONENTS)
+    return _nlp
+
+def _tag_doc(doc):
+    """Tags the street number, apartment number and street of an already processed address."""
     tagged_components = {"st_num": None, "apt_num": None, "street": None}
 
     # Loop through the tokens to find matches based on conditions
     for i, token in enumerate(doc):
-        if i == 0 and token.pos_ == "NUM" and token.text.lower() not in spelled_out_numbers:
+        if i == 0 and token.pos_ == "NUM" and token.text.lower() not in SPELLED_OUT_NUMBERS:
             tagged_components["st_num"] = token.text
-        elif i == 1 and is_alphanumeric(token) and token.text.lower() not in spelled_out_numbers:
+        elif i == 1 and is_alphanumeric(token) and token.text.lower() not in SPELLED_OUT_NUMBERS:
             tagged_components["apt_num"] = token.text
-        elif i == 1 and token.pos_=="NUM"and token.text.lower() not in spelled_out_numbers:
+        elif i == 1 and token.pos_=="NUM"and token.text.lower() not in SPELLED_OUT_NUMBERS:
             tagged_components["apt_num"] = token.text
         elif i > 0:
             # Concatenate the remaining tokens as the street name
             tagged_components["street"] = " ".join([tok.text for tok in doc[i:]])
             break
-    return tagged_components
\ No newline at end of file
+    return tagged_components
+
+def tag_address(address):
+    """
+    Tag the components of the address using the defined pattern.
+    Returns a dictionary with the components tagged, None where a component is missing.
+    """
+    tags = tag_address_columns(pd.Series([address], dtype="string")).iloc[0]
+    return {component: None if pd.isna(value) else value for component, value in tags.items()}
+
+def rule_tag_addresses(addresses):
+    """
+    Tags simple addresses with `SIMPLE_ADDRESS_PATTERN` instead of spaCy, in one vectorized pass.
+
+    Returns:
+    - pd.DataFrame: `st_num`, `apt_num` and `street` columns aligned with `addresses`, all missing
+      where the address is not in the simple form and has to go through spaCy.
+    """
+    return addresses.astype("string").str.extract(SIMPLE_ADDRESS_PATTERN.pattern, flags=re.IGNORECASE)
+
+def tag_address_columns(addresses, batch_size=1000):
+    """
+    Tags a column of addresses into street number, apartment number and street columns.
+
+    Each distinct address is tagged once: simple addresses with `rule_tag_addresses`, and only
+    the rest with spaCy.
+
+    Parameters:
+    - addresses (pd.Series): The addresses to tag.
+    - batch_size (int): Number of addresses sent through `nlp.pipe` at a time. Default is 1000.
+
+    Returns:
+    - pd.DataFrame: `st_num`, `apt_num` and `street` string columns aligned with `addresses`.
+    """
+    addresses = addresses.astype("string")
+    unique_addresses = pd.Series(addresses.dropna().unique(), dtype="string")
+    tags = rule_tag_addresses(unique_addresses)
+    tags.index = unique_addresses
+
+    untagged = tags.index[tags["st_num"].isna()]
+    if len(untagged):
+        nlp = get_nlp()
+        docs = nlp.pipe(list(untagged), batch_size=batch_size)
+        tags.loc[untagged] = pd.DataFrame([_tag_doc(doc) for doc in docs], index=untagged, columns=tags.columns)
+
+    tags = tags.reindex(addresses)
+    tags.index = addresses.index
+    return tags
+
+def clean_home_addresses(df):
+    """
+    Cleans the addresses of merged results and appraisal rows in one vectorized pass: expands
+    street types, splits the owner address, tags the property address and builds the
+    `new_address` used for geocoding.
+
+    The owner's mailing address is used for `new_address` when it matches the property,
+    otherwise the tagged street and the school district's city.
+
+    Parameters:
+    - df (pd.DataFrame): Homes rows with `address`, `owner_address` and `school_district`.
+
+    Returns:
+    - pd.DataFrame: `df` with the owner, tag, city, state and `new_address` columns added.
+    """
+    df = df.assign(address=expand_street_types(df["address"].astype("string")))
+    df = owner_address_cleaner(df)
+    df = df.assign(**tag_address_columns(df["address"]))
+    df = df.assign(city=df["school_district"].map(school_city_map).astype("string"), state="OH")
+
+    owner_address = (
+        df["owner_street_address"] + " " + df["owner_city"] + ", " +
+        df["owner_state"] + " " + df["owner_postal_code"]
+    )
+    site_address = df["st_num"] + " " + df["street"] + " " + df["city"] + ", " + df["state"]
+    return df.assign(new_address=owner_address.where(df["owner_home_address_match"] == "Y", site_address))
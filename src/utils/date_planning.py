@@ -0,0 +1,154 @@
+import glob
+import logging
+import pandas as pd
+from datetime import timedelta
+
+from config import scraping_config
+from utils.homes_data import parse_transfer_dates
+
+def split_date_range(start, end):
+    """
+    Splits a date range in two at its midpoint.
+
+    Parameters:
+    - start (str): Start date of the range (MM/DD/YYYY).
+    - end (str): End date of the range (MM/DD/YYYY).
+
+    Returns:
+    - tuple: The first and second halves as (start, end) tuples of MM/DD/YYYY strings.
+    """
+    start_dt = pd.to_datetime(start)
+    end_dt = pd.to_datetime(end)
+
+    # Calculating the midpoint of the start and end date
+    midpoint = start_dt + (end_dt - start_dt) / 2
+    return (
+        (f"{start_dt:%m/%d/%Y}", f"{midpoint:%m/%d/%Y}"),
+        (f"{midpoint + timedelta(days=1):%m/%d/%Y}", f"{end_dt:%m/%d/%Y}"),
+    )
+
+class SlicePlanner:
+    """
+    Cuts each year into date slices expected to stay under the search results cap.
+
+    Expected sales per day come from the historical homes files: the year's own daily counts when
+    it has been scraped before, otherwise the average daily count for the same month and weekday
+    across all years. Counts returned by real searches are fed back with `observe`, which rescales
+    the estimates for the current search filters.
+
+    Parameters:
+    - transfer_dates (pd.Series): Historical transfer dates, one per sale.
+    - cap (int): Results cap of one search. Defaults to `scraping_config["max_entries_per_page"]`.
+    - fill_ratio (float): Share of the cap each slice is planned to fill, leaving room for
+      estimation error. Defaults to `scraping_config["planner_fill_ratio"]`.
+    """
+
+    def __init__(self, transfer_dates, cap=None, fill_ratio=None):
+        self.cap = cap or scraping_config["max_entries_per_page"]
+        self.fill_ratio = fill_ratio or scraping_config["planner_fill_ratio"]
+        self.observed = 0
+        self.expected = 0.0
+
+        transfer_dates = pd.Series(transfer_dates).dropna()
+        if transfer_dates.empty:
+            self.daily_counts = pd.Series(dtype=float)
+            self.profile = pd.Series(dtype=float)
+            return
+
+        daily = transfer_dates.dt.normalize().value_counts()
+        years = transfer_dates.dt.year.unique()
+        calendar = pd.DatetimeIndex([
+            day for year in years
+            for day in pd.date_range(f"{year}-01-01", f"{year}-12-31", freq="D")
+        ])
+        self.daily_counts = daily.reindex(calendar, fill_value=0).astype(float)
+        self.profile = self.daily_counts.groupby(
+            [self.daily_counts.index.month, self.daily_counts.index.weekday]
+        ).mean()
+
+    @classmethod
+    def from_csvs(cls, patterns, **kwargs):
+        """
+        Builds a planner from the transfer dates of historical homes CSVs.
+
+        Parameters:
+        - patterns (list of str): Glob patterns of the CSV files to read.
+        """
+        frames = []
+        for pattern in patterns:
+            for path in sorted(glob.glob(pattern)):
+                frames.append(pd.read_csv(path, usecols=["parcel_number", "transfer_date"], dtype=str))
+        if not frames:
+            logging.warning(f"No history found for slice planning in {patterns}.")
+            return cls(pd.Series(dtype="datetime64[ns]"), **kwargs)
+        sales = pd.concat(frames).drop_duplicates()
+        return cls(parse_transfer_dates(sales["transfer_date"]), **kwargs)
+
+    @classmethod
+    def from_store(cls, store, **kwargs):
+        """
+        Builds a planner from the transfer dates in the homes Parquet dataset.
+
+        Parameters:
+        - store (HomesStore): The dataset to read.
+        """
+        dates = store.read(columns=["transfer_date"])["transfer_date"]
+        if dates.empty:
+            logging.warning(f"No history found for slice planning in {store.root}.")
+        return cls(dates, **kwargs)
+
+    @property
+    def scale(self):
+        """Ratio of observed to expected entries across every observed search."""
+        return self.observed / self.expected if self.expected else 1.0
+
+    def expected_counts(self, start, end):
+        """
+        Estimates sales per day over a date range, before scaling by observed counts.
+
+        Returns:
+        - pd.Series: Expected count per day, indexed by date.
+        """
+        days = pd.date_range(pd.to_datetime(start), pd.to_datetime(end), freq="D")
+        if days.isin(self.daily_counts.index).all():
+            return self.daily_counts.reindex(days)
+        if self.profile.empty:
+            return pd.Series(0.0, index=days)
+        keys = pd.MultiIndex.from_arrays([days.month, days.weekday])
+        return pd.Series(self.profile.reindex(keys).fillna(0).to_numpy(), index=days)
+
+    def observe(self, start, end, count):
+        """Records the number of entries a real search returned for a date range."""
+        self.observed += count
+        self.expected += self.expected_counts(start, end).sum()
+        logging.info(f"Observed {count} entries for {start} to {end}. Planner scale is now {self.scale:.2f}.")
+
+    def plan(self, start, end):
+        """
+        Splits a date range into consecutive slices expected to stay under the results cap.
+
+        Parameters:
+        - start (str): Start date of the range (MM/DD/YYYY).
+        - end (str): End date of the range (MM/DD/YYYY).
+
+        Returns:
+        - list of tuples: (start, end) MM/DD/YYYY strings covering the whole range.
+        """
+        expected = self.expected_counts(start, end) * self.scale
+        budget = self.cap * self.fill_ratio
+
+        slices = []
+        slice_start = expected.index[0]
+        total = 0.0
+        for day, count in expected.items():
+            if total + count > budget and day > slice_start:
+                slices.append((slice_start, day - timedelta(days=1)))
+                slice_start, total = day, 0.0
+            total += count
+        slices.append((slice_start, expected.index[-1]))
+
+        logging.info(f"Planned {len(slices)} slices for {start} to {end}.")
+        return [(f"{first:%m/%d/%Y}", f"{last:%m/%d/%Y}") for first, last in slices]
+
+    def plan_year(self, year):
+        return self.plan(f"01/01/{year}", f"12/31/{year}")
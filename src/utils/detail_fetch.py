@@ -0,0 +1,159 @@
+import time
+import logging
+import pandas as pd
+from lxml import html as lxml_html
+from concurrent.futures import ThreadPoolExecutor
+
+from config import XPATHS, RETRY_LIMIT, scraping_config
+from utils.rate_limiting import RateLimiter
+from utils.html_tables import parse_label_value_table
+
+APPRAISAL_COLUMNS_TO_DROP = ["Year Built", "Deed Number", "# of Parcels Sold"]
+APPRAISAL_COLUMN_NAMES = {
+    "# Bedrooms": "Bedrooms",
+    "# Full Bathrooms": "Full Baths",
+    "# Half Bathrooms": "Half Baths"
+}
+
+def format_appraisal_table(appraisal_values):
+    """
+    Turns the label/value pairs of a property page's appraisal table into a single row with the homes column names.
+    """
+    return pd.DataFrame([{
+        APPRAISAL_COLUMN_NAMES.get(label, label): value
+        for label, value in appraisal_values.items()
+        if label not in APPRAISAL_COLUMNS_TO_DROP
+    }])
+
+def element_text(element):
+    """Returns an element's text with one line per text node, like Selenium's rendered `.text`."""
+    return "\n".join(part.strip() for part in element.itertext() if part.strip())
+
+def parse_property_page(page_html):
+    """
+    Extracts the property details from the HTML of a property summary page.
+
+    Parameters:
+    - page_html (str or bytes): The page's HTML.
+
+    Returns:
+    - pd.DataFrame: One row of appraisal details with parcel_id, school_district and owner_address,
+      the same as `extract_property_details`, or None if the page is not a property page.
+    """
+    tree = lxml_html.fromstring(page_html)
+
+    def first(xpath):
+        elements = tree.xpath(xpath)
+        return elements[0] if elements else None
+
+    parcel = first(XPATHS["property"]["parcel_id"])
+    parcel_parts = element_text(parcel).split("\n") if parcel is not None else []
+    if len(parcel_parts) < 2 or not parcel_parts[1].strip():
+        logging.warning(f"Unexpected format for parcel_id: {parcel_parts}")
+        return None
+    parcel_id = parcel_parts[1].strip()
+
+    table = first(XPATHS["view"]["appraisal_information"])
+    if table is None:
+        logging.warning(f"Appraisal table is missing for parcel {parcel_id}.")
+        return None
+    appraisal_values = parse_label_value_table(table)
+    if not appraisal_values:
+        logging.warning(f"Appraisal table is empty for parcel {parcel_id}.")
+        return None
+    appraisal_table = format_appraisal_table(appraisal_values)
+
+    school_district = first(XPATHS["property"]["school_district"])
+    owner = first(XPATHS["property"]["owner"])
+    appraisal_table["parcel_id"] = parcel_id
+    appraisal_table["school_district"] = element_text(school_district) if school_district is not None else None
+    appraisal_table["owner_address"] = element_text(owner) if owner is not None else None
+    return appraisal_table
+
+def property_url(parcel_id, url_template=None):
+    """Builds the summary page URL of a parcel, e.g. "001-0001-0059-00"."""
+    template = url_template or scraping_config["property_url"]
+    return template.format(parcel=str(parcel_id).strip().replace("-", ""))
+
+def session_from_driver(driver, pool_size=None):
+    """
+    Creates an HTTP session that carries the Selenium browser's cookies and user agent, so detail
+    pages can be requested directly within the browser's search session.
+
+    Parameters:
+    - driver (WebDriver): The browser to borrow cookies from.
+    - pool_size (int): Connections kept open per host. Defaults to `scraping_config["detail_fetch_workers"]`.
+
+    Returns:
+    - requests.Session: The pooled session.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    pool_size = pool_size or scraping_config["detail_fetch_workers"]
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent;")
+    for cookie in driver.get_cookies():
+        session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+    return session
+
+def fetch_property_details(parcel_ids, session, max_workers=None, requests_per_second=None,
+                           retries=None, timeout=None, url_template=None, rate_limiter=None):
+    """
+    Requests the summary page of each parcel over HTTP and extracts its property details.
+
+    All workers share one pooled session and one rate limit. Each page is retried on
+    connection errors and 5xx/429 responses.
+
+    Parameters:
+    - parcel_ids (list of str): Parcel numbers as shown in the results table.
+    - session (requests.Session): Session to use, e.g. from `session_from_driver`.
+    - max_workers (int): Number of concurrent requests. Defaults to `scraping_config["detail_fetch_workers"]`.
+    - requests_per_second (float): Global cap on requests. Defaults to `scraping_config["detail_fetch_requests_per_second"]`.
+    - retries (int): Attempts per page. Defaults to `RETRY_LIMIT`.
+    - timeout (float): Seconds to wait for each response. Defaults to `scraping_config["page_load_timeout"]`.
+    - url_template (str): Summary page URL with a `{parcel}` field. Defaults to `scraping_config["property_url"]`.
+    - rate_limiter: Optional limiter to use instead of one built from `requests_per_second`, e.g. the
+      `SharedRateLimiter` of a pool of browsers or an `AdaptiveRateLimiter`. Every response is reported to its `record`.
+
+    Returns:
+    - list: A details DataFrame per parcel, in input order, or None where the page could not be fetched or parsed.
+    """
+    max_workers = max_workers or scraping_config["detail_fetch_workers"]
+    if rate_limiter is None:
+        rate_limiter = RateLimiter(requests_per_second or scraping_config["detail_fetch_requests_per_second"])
+    retries = retries or RETRY_LIMIT
+    timeout = timeout or scraping_config["page_load_timeout"]
+
+    def fetch(parcel_id):
+        url = property_url(parcel_id, url_template)
+        for attempt in range(1, retries + 1):
+            rate_limiter.acquire()
+            start = time.monotonic()
+            try:
+                response = session.get(url, timeout=timeout)
+            except Exception as e:
+                rate_limiter.record(time.monotonic() - start, ok=False)
+                logging.info(f"Attempt {attempt}/{retries} for parcel {parcel_id} failed: {e}")
+                continue
+            rate_limiter.record(time.monotonic() - start, ok=response.status_code != 429 and response.status_code < 500)
+            if response.status_code == 429 or response.status_code >= 500:
+                logging.info(f"Attempt {attempt}/{retries} for parcel {parcel_id} returned {response.status_code}.")
+                continue
+            if response.status_code >= 400:
+                logging.warning(f"Parcel {parcel_id} page returned {response.status_code}.")
+                return None
+            try:
+                return parse_property_page(response.content)
+            except Exception as e:
+                logging.error(f"Error parsing details for parcel {parcel_id}: {e}")
+                return None
+        logging.error(f"Failed to fetch details for parcel {parcel_id} after {retries} attempts.")
+        return None
+
+    logging.info(f"Fetching {len(parcel_ids)} property pages with {max_workers} workers.")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(fetch, parcel_ids))
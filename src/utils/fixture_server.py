@@ -0,0 +1,122 @@
+import os
+import time
+import html
+import logging
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+def save_property_page(driver, directory, parcel_id):
+    """
+    Saves the property page open in the browser, so it can be served by a `FixtureServer`.
+
+    Returns:
+    - str: Path of the saved page, `{directory}/{parcel}.html` with the dashes removed from the parcel.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{str(parcel_id).strip().replace('-', '')}.html")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(driver.page_source)
+    return path
+
+def render_property_page(parcel_id, appraisal, school_district, owner_address):
+    """
+    Builds a minimal property summary page with the layout the XPATHS in xpaths.yaml expect.
+
+    Parameters:
+    - parcel_id (str): Parcel number, e.g. "001-0001-0059-00".
+    - appraisal (dict): Appraisal table labels to values, e.g. {"# Bedrooms": "3"}.
+    - school_district (str): School district name.
+    - owner_address (str): Owner name and mailing address, one line per row.
+
+    Returns:
+    - str: The page's HTML.
+    """
+    rows = "".join(
+        f"<tr><td>{html.escape(str(label))}</td><td>{html.escape(str(value))}</td></tr>"
+        for label, value in appraisal.items()
+    )
+    owner = "<br>".join(html.escape(line) for line in str(owner_address).split("\n"))
+    return (
+        "<html><body>"
+        f'<div id="parcel-header-info"><div>Parcel ID<br>{html.escape(parcel_id)}</div></div>'
+        '<table id="property_information"><tbody>'
+        "<tr><td><div>Tax District</div><div>CINCINNATI</div><div>School District</div>"
+        f"<div>{html.escape(str(school_district))}</div></td></tr>"
+        "<tr><td><div>Appraisal Area</div><div>00100</div></td></tr>"
+        f"<tr><td><div>Owner Name and Address</div><div>{owner}</div></td></tr>"
+        "</tbody></table>"
+        f'<div id="property_overview_wrapper"><table>{rows}</table></div>'
+        "</body></html>"
+    )
+
+class FixtureServer:
+    """
+    Local HTTP server that serves saved property pages at the same paths as the auditor's site,
+    for testing and benchmarking the HTTP detail fetcher without touching the live site.
+
+    Pages are looked up as `{directory}/{parcel}.html` for any request path whose second-to-last
+    segment is the parcel, e.g. /view/re/0010001005900/summary. Missing pages return 404.
+
+    Parameters:
+    - directory (str): Folder of saved pages.
+    - latency (float): Seconds added to every response to mimic the live site. Default is 0.
+    """
+
+    def __init__(self, directory, latency=0.0):
+        self.directory = directory
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url_template(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/view/re/{{parcel}}/summary"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                segments = [segment for segment in self.path.split("?")[0].split("/") if segment]
+                path = os.path.join(server.directory, f"{segments[-2]}.html") if len(segments) >= 2 else None
+                if path is None or not os.path.exists(path):
+                    self.send_error(404)
+                    return
+                with open(path, "rb") as file:
+                    body = file.read()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logging.debug(f"Fixture server: {format % args}")
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
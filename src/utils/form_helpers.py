@@ -2,13 +2,14 @@ import re
 import os
 import time
 import pandas as pd
-import numpy as np
-from datetime import timedelta, datetime
+from datetime import datetime
 import logging
 
-from config import XPATHS, school_city_map, street_type_map
+from config import XPATHS, scraping_config
 
-from utils.address_cleaners import owner_address_cleaner, tag_address
+from utils.address_cleaners import clean_home_addresses
+from utils.date_planning import split_date_range
+from utils.homes_store import HomesStore
 
 # Selenium-related imports
 from selenium.webdriver.common.by import By
@@ -224,6 +225,20 @@ def safe_quit(driver):
     except Exception as e:
         logging.error(f"Failed to quit the driver gracefully: {e}")
 
+def get_num_entries(driver, wait):
+    """
+    Reads the total number of search results from the results table summary.
+
+    Returns:
+    - int: Number of entries matching the current search.
+    """
+    try:
+        # Getting the number of search results based on the critieria provided by user
+        raw_text = get_text(driver, wait, XPATHS["results"]["search_results_number"])
+        return pd.to_numeric(raw_text.split(" ")[5].replace(",", ""))
+    except Exception as e:
+        raise ValueError(f"Failed to extract number of entries: {e}")
+
 def check_reset_needed(driver, wait, start, end, dates):
     """
     Checks if the search needs to be reset due to 1000 entries and updates the time slice.
@@ -243,26 +258,13 @@ def check_reset_needed(driver, wait, start, end, dates):
     start_dt = safe_to_datetime(start, "start date")
     end_dt = safe_to_datetime(end, "end date")
 
-    try:
-        # Getting the number of search results based on the critieria provided by user
-        raw_text = get_text(driver, wait, XPATHS["results"]["search_results_number"])
-        total_entries = pd.to_numeric(raw_text.split(" ")[5].replace(",", ""))
-    except Exception as e:
-        raise ValueError(f"Failed to extract number of entries: {e}")   
+    total_entries = get_num_entries(driver, wait)
 
-    if total_entries >= 1000:
-        logging.info(f"Entries = {total_entries} for {start} to {end}. Splitting dates further since the entries are greater than or equal to the threshold of 1000.")
+    if total_entries >= scraping_config["max_entries_per_page"]:
+        logging.info(f"Entries = {total_entries} for {start} to {end}. Splitting dates further since the entries are greater than or equal to the threshold of {scraping_config['max_entries_per_page']}.")
 
-        # Calculating the midpoint of the start and end date
-        midpoint = start_dt + (end_dt - start_dt) / 2
-        midpoint_str = f"{midpoint:%m/%d/%Y}"
+        (_, midpoint_str), new_slice = split_date_range(start, end)
 
-        # Creating the new time slice
-        new_slice = (
-            f"{midpoint + timedelta(days=1):%m/%d/%Y}"
-            ,f"{end_dt:%m/%d/%Y}"
-            )
-        
         # Updating the list of dates        
         updated_dates, modified = split_replace_add_time_slice(
             dates, f"{end_dt:%m/%d/%Y}", midpoint_str, new_slice
@@ -271,7 +273,6 @@ def check_reset_needed(driver, wait, start, end, dates):
     
     if total_entries < 1:
         logging.warning(f"Search parameters between {start_dt} and {end_dt} yielded no results. Moving to next date range.")
-        safe_quit(driver)
         return False, False, dates, total_entries
 
     return False, False, dates, total_entries
@@ -322,9 +323,38 @@ def save_to_csv(df, file_path, overwrite=False, index=False):
         logging.error(f"Error saving CSV to {file_path}: {e}")
         raise
 
-def final_csv_conversion(all_data_df, appraisal_data_df, dates, start_date, end_date, year):
+def process_home_data(all_data_df, appraisal_data_df):
     """
-    Processes and saves home data to CSV files with additional cleaning and address concatenation.
+    Merges the results and appraisal tables and cleans them into the final homes format.
+
+    Parameters:
+    - all_data_df (pd.DataFrame): Rows from the search results tables.
+    - appraisal_data_df (pd.DataFrame): Rows from the property detail pages.
+
+    Returns:
+    - pd.DataFrame: The cleaned homes data, ready to be saved.
+    """
+    # Merge and process data
+
+    final_df = all_data_df.merge(appraisal_data_df, left_on="Parcel Number", right_on="parcel_id", how="left")
+    logging.info("Beginning cleaning and formatting data.")
+    final_df = clean_and_format_columns(final_df, ["last_transfer_date", "last_sale_amount", "parcel_id"])
+
+    # Street types, owner address, address tags and the geocoding address in one pass
+    logging.info("Processing address columns for geocoding.")
+    return clean_home_addresses(final_df)
+
+def final_csv_conversion(all_data_df, appraisal_data_df, dates, start_date, end_date, store=None):
+    """
+    Processes home data with additional cleaning and address concatenation, and upserts it into
+    the homes Parquet dataset (`store`, by default `HomesStore()`).
+
+    A slice is processed and saved whole. Searches are capped below 1,000 results, and at that
+    size streaming it in chunks used more memory than processing it whole while rewriting the
+    month partitions once per chunk.
+
+    Returns:
+    - dict: The upsert statistics, or None if there was nothing to save.
     """
     if appraisal_data_df.empty:
         logging.warning("Appraisal data is empty. Exiting function.")
@@ -335,57 +365,11 @@ def final_csv_conversion(all_data_df, appraisal_data_df, dates, start_date, end_
         logging.error("Dates must be a list of tuples with start and end dates.")
         raise ValueError("Invalid dates format")
 
-    # Merge and process data
-
-    final_df = all_data_df.merge(appraisal_data_df, left_on="Parcel Number", right_on="parcel_id", how="left")
     logging.info(f'These are the dates in the list: {dates}')
-
-    logging.info("Beginning cleaning and formatting data.")
-    final_df = clean_and_format_columns(final_df, ["last_transfer_date", "last_sale_amount", "parcel_id"])
-
-    logging.info("Beginning replacing of the street type (i.e. dr, rd, way, etc...) with the new mapping.")    
-    pattern = r'\b(' + '|'.join(map(re.escape, street_type_map.keys())) + r')\b'
-    final_df['address'] = final_df['address'].str.replace(
-                            pattern,
-                            lambda m: street_type_map[m.group(0)],
-                            regex=True
-                        )
-    
-    logging.info("Owners data is starting the cleaning and formatting data process.")
-    final_df = owner_address_cleaner(final_df)
-
-
-    # Address processing
-    logging.info("Processing address columns for geocoding.")
-    address_parts = [
-    {**tag_address(address), 'parcel_number': parcel}
-    for parcel, address in zip(final_df.parcel_number, final_df.address)
-    ]
-    address_df = pd.DataFrame.from_dict(address_parts)
-    address_df = address_df.drop_duplicates()
-    print(address_df.parcel_number.value_counts())
-    final_df = final_df.merge(address_df, left_on='parcel_number', right_on='parcel_number',how='left')
-
-    # Add city and state
-    final_df["city"] = final_df.school_district.map(school_city_map)
-    final_df["state"] = "OH"
-
-    # Create concatenated address field
-    final_df["new_address"] = np.where(
-        final_df["owner_home_address_match"] == "Y",
-        final_df["owner_street_address"] + " " + final_df["owner_city"] + ", " +
-        final_df["owner_state"] + " " + final_df["owner_postal_code"],
-        final_df["st_num"] + " " + final_df["street"] + " " + final_df["city"] + ", " + final_df["state"]
-    )
-    
-    final_df = final_df.drop_duplicates()
+    final_df = process_home_data(all_data_df, appraisal_data_df)
     logging.info(f'Removing these dates: {start_date} and {end_date}')
     dates.remove((start_date, end_date))
 
-    # Save CSV files
-    homes_csv_path = get_file_path("..", f"{year} Homes.csv")
-    all_homes_csv_path = get_file_path("..", "All Homes.csv")
-    save_to_csv(final_df, homes_csv_path)
-    save_to_csv(final_df, all_homes_csv_path)
-
-    return {"homes_csv": homes_csv_path, "all_homes_csv": all_homes_csv_path}
+    # Re-running a slice replaces its sales instead of appending duplicates
+    store = store or HomesStore()
+    return store.upsert(final_df)
@@ -0,0 +1,114 @@
+import time
+import sqlite3
+import logging
+import threading
+
+EMPTY_RESULT = {'formatted_address': None, 'longitude': None, 'latitude': None}
+
+def normalize_address(address):
+    """
+    Normalizes an address so that spelling variations of the same query share a cache entry.
+
+    Parameters:
+    - address (str): The street address to normalize.
+
+    Returns:
+    - str: The address in upper case with commas removed and whitespace collapsed.
+    """
+    return " ".join(str(address).upper().replace(",", " ").split())
+
+class GeocodeCache:
+    """
+    Persistent SQLite cache of geocoding results keyed on the normalized address and zip code.
+
+    Both found addresses and misses are stored, each with its own time to live, so a
+    re-run only sends queries that were never made or whose entry has expired.
+    """
+
+    def __init__(self, path, hit_ttl_days=365, miss_ttl_days=30):
+        self.path = path
+        self.hit_ttl = hit_ttl_days * 86400
+        self.miss_ttl = miss_ttl_days * 86400
+        self.hits = 0
+        self.lookups = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS geocodes (
+                    address TEXT NOT NULL,
+                    zip_code TEXT NOT NULL,
+                    formatted_address TEXT,
+                    longitude REAL,
+                    latitude REAL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (address, zip_code)
+                )
+                """
+            )
+
+    def get(self, address, zip_code):
+        """
+        Looks up a cached result.
+
+        Parameters:
+        - address (str): The street address that was queried.
+        - zip_code (int or str): The zip code appended to the query.
+
+        Returns:
+        - dict: The cached result (with None values for a cached miss), or None if the
+          query is not cached or its entry has expired.
+        """
+        with self._lock:
+            self.lookups += 1
+            row = self._conn.execute(
+                "SELECT formatted_address, longitude, latitude FROM geocodes "
+                "WHERE address = ? AND zip_code = ? AND expires_at > ?",
+                (normalize_address(address), str(zip_code), time.time()),
+            ).fetchone()
+            if row is None:
+                return None
+            self.hits += 1
+        return dict(zip(EMPTY_RESULT, row))
+
+    def set(self, address, zip_code, result):
+        """
+        Stores the result of a query. A result whose formatted_address is None is stored as a miss.
+        """
+        ttl = self.miss_ttl if result['formatted_address'] is None else self.hit_ttl
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    normalize_address(address),
+                    str(zip_code),
+                    result['formatted_address'],
+                    result['longitude'],
+                    result['latitude'],
+                    time.time() + ttl,
+                ),
+            )
+
+    def purge_expired(self):
+        """Deletes expired entries and returns how many were removed."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM geocodes WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def stats(self):
+        """Returns the lookup counters and hit rate for this session."""
+        return {"lookups": self.lookups, "hits": self.hits, "hit_rate": self.hit_rate}
+
+    def log_stats(self):
+        logging.info(
+            f"Geocode cache: {self.hits} hits out of {self.lookups} lookups ({self.hit_rate:.1%})."
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
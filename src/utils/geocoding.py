@@ -1,7 +1,36 @@
 import os
 import re
-import googlemaps
-from config import zip_code_map
+import logging
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+from config import zip_code_map, geocoding_config
+
+from utils.geocode_cache import GeocodeCache, EMPTY_RESULT
+from utils.geocoding_backends import GoogleMapsBackend, RetryingBackend
+from utils.rate_limiting import RateLimiter
+
+_client = None
+_cache = None
+
+def get_client():
+    """Creates the Google Maps backend the first time it is needed and reuses it afterwards."""
+    global _client
+    if _client is None:
+        # Initialize the Google Maps client with your API key
+        _client = GoogleMapsBackend(os.getenv("MAPS_API_KEY"))
+    return _client
+
+def get_cache():
+    """Opens the persistent geocode cache configured in `geocoding_config` once per process."""
+    global _cache
+    if _cache is None:
+        _cache = GeocodeCache(
+            geocoding_config["cache_path"],
+            hit_ttl_days=geocoding_config["hit_ttl_days"],
+            miss_ttl_days=geocoding_config["miss_ttl_days"],
+        )
+    return _cache
 
 def is_only_city_state_country_regex(address):
     # Regex pattern to match strings that might include a country
@@ -15,34 +44,136 @@ def address_has_no_street_number(address):
 
     return re.match(pattern, address) is not None
 
-def get_address_details_with_cities(address,school_district):
-    # Initialize the Google Maps client with your API key
-    api_key = os.getenv("MAPS_API_KEY")
-    gmaps = googlemaps.Client(key=api_key)
+def rooftop_details(response):
+    """
+    Picks the first ROOFTOP result out of a geocoding response.
+
+    Returns:
+    - dict: The formatted address, longitude and latitude, or None values if there is no ROOFTOP result.
+    """
+    # Filtering the results for only ROOFTOP location types
+    rooftop_results = [result for result in response if result['geometry']['location_type'] == 'ROOFTOP']
+    if not rooftop_results:
+        return dict(EMPTY_RESULT)
+    result = rooftop_results[0]
+    location = result['geometry']['location']
+    return {
+        'formatted_address': result['formatted_address'],
+        'longitude': location['lng'],
+        'latitude': location['lat']
+    }
 
-    for zip_code in zip_code_map[school_district]:
+def get_address_details_with_cities(address, school_district, gmaps=None, cache=None, zip_codes=None):
+    """
+    Geocodes an address by trying each zip code of its school district until a ROOFTOP result is found.
+
+    Every query, found or not, is stored in the geocode cache so repeat runs do not call the API again.
+
+    Parameters:
+    - address (str): The street address to geocode.
+    - school_district (str): The school district used to pick candidate zip codes from `zip_code_map`.
+    - gmaps (GeocoderBackend): Backend to use. Defaults to the shared Google Maps backend from `get_client`.
+    - cache (GeocodeCache): Cache to use. Defaults to the shared cache from `get_cache`.
+    - zip_codes (list of int): Candidate zip codes in the order to try them. Defaults to `zip_code_map[school_district]`.
+
+    Returns:
+    - dict: The formatted address, longitude and latitude, or None values if nothing was found.
+    """
+    cache = cache if cache is not None else get_cache()
+    if zip_codes is None:
+        zip_codes = zip_code_map[school_district]
+
+    for zip_code in zip_codes:
         full_address_query = f"{address} {zip_code}"
-        # Make the geocoding request
-        try:
-            response = gmaps.geocode(full_address_query)
-        except Exception as e:
-            print(f"Geocoding failed for {full_address_query}: {e}")
-            continue
-        # Filtering the results for only ROOFTOP location types
-        rooftop_results = [result for result in response if result['geometry']['location_type'] == 'ROOFTOP']
-        if rooftop_results:
-            result = rooftop_results[0] 
-            formatted_address = result['formatted_address']
-            location = result['geometry']['location']
-        # # Check if the formatted address is not just city, state, country
-            return {
-                'formatted_address': formatted_address,
-                'longitude': location['lng'],
-                'latitude': location['lat']
-            }    
-        # Return if no rooftop result found for the current zip code
-        # print(f"{full_address_query}: No ROOFTOP result found.")
-        
+        details = cache.get(address, zip_code)
+        if details is None:
+            # Make the geocoding request
+            try:
+                response = (gmaps or get_client()).geocode(full_address_query)
+            except Exception as e:
+                print(f"Geocoding failed for {full_address_query}: {e}")
+                continue
+            details = rooftop_details(response)
+            cache.set(address, zip_code, details)
+
+        if details['formatted_address'] is not None:
+            return details
+
     # If no valid address is found after all attempts
-    print(full_address_query, "No valid address found.")
-    return {'formatted_address': None, 'longitude': None, 'latitude': None}
\ No newline at end of file
+    print(address, "No valid address found.")
+    return dict(EMPTY_RESULT)
+
+def batch_geocode(df, backend=None, cache=None, max_workers=None, requests_per_second=None,
+                  retries=None, backoff=None, ranker=None):
+    """
+    Geocodes every distinct `new_address`/`school_district` pair of a DataFrame concurrently.
+
+    All workers share one backend, one cache and one rate limit. Results are written back to the
+    `formatted_address`, `longitude` and `latitude` columns in a single step.
+
+    Parameters:
+    - df (pd.DataFrame): Rows with `new_address` and `school_district` columns.
+    - backend (GeocoderBackend): Backend to use. Defaults to the shared Google Maps backend.
+    - cache (GeocodeCache): Cache to use. Defaults to the shared persistent cache.
+    - max_workers (int): Number of concurrent lookups. Defaults to `geocoding_config["max_workers"]`.
+    - requests_per_second (float): Global cap on backend calls. Defaults to `geocoding_config["requests_per_second"]`.
+    - retries (int): Attempts per backend call. Defaults to `geocoding_config["retries"]`.
+    - backoff (float): Initial retry delay in seconds. Defaults to `geocoding_config["backoff_seconds"]`.
+    - ranker (ZipCandidateRanker): Orders each address's candidate zips using its `street` and, when the
+      owner lives at the home, `owner_postal_code`. Resolved zips are recorded back into it.
+      Defaults to the order of `zip_code_map`.
+
+    Returns:
+    - pd.DataFrame: A copy of `df` with the geocoding columns filled in.
+    """
+    key_columns = ["new_address", "school_district"]
+    missing = [col for col in key_columns if col not in df.columns]
+    if missing:
+        logging.error(f"Cannot geocode, missing columns: {missing}")
+        raise ValueError(f"DataFrame is missing required columns: {missing}")
+
+    backend = RetryingBackend(
+        backend if backend is not None else get_client(),
+        RateLimiter(requests_per_second or geocoding_config["requests_per_second"]),
+        retries=retries or geocoding_config["retries"],
+        backoff=backoff if backoff is not None else geocoding_config["backoff_seconds"],
+    )
+    cache = cache if cache is not None else get_cache()
+
+    rows = df.dropna(subset=key_columns).drop_duplicates(subset=key_columns)
+    rows = rows[rows["school_district"].isin(zip_code_map)]
+    pairs = rows[key_columns]
+
+    if ranker is None:
+        candidates = [None] * len(rows)
+    else:
+        streets = rows["street"] if "street" in rows.columns else pd.Series(None, index=rows.index)
+        owner_zips = pd.Series(None, index=rows.index, dtype=object)
+        if "owner_postal_code" in rows.columns and "owner_home_address_match" in rows.columns:
+            owner_zips = rows["owner_postal_code"].where(rows["owner_home_address_match"] == "Y")
+        candidates = [
+            ranker.rank(school_district, street, owner_zip)
+            for school_district, street, owner_zip in zip(rows["school_district"], streets, owner_zips)
+        ]
+
+    def geocode_pair(pair):
+        (address, school_district), zip_codes = pair
+        return get_address_details_with_cities(
+            address, school_district, gmaps=backend, cache=cache, zip_codes=zip_codes
+        )
+
+    logging.info(f"Geocoding {len(pairs)} distinct addresses with {max_workers or geocoding_config['max_workers']} workers.")
+    with ThreadPoolExecutor(max_workers=max_workers or geocoding_config["max_workers"]) as executor:
+        results = list(executor.map(geocode_pair, zip(pairs.itertuples(index=False, name=None), candidates)))
+    cache.log_stats()
+
+    results = pd.DataFrame(
+        results,
+        columns=list(EMPTY_RESULT),
+        index=pd.MultiIndex.from_frame(pairs),
+    )
+    if ranker is not None and "street" in rows.columns:
+        ranker.record(rows.assign(formatted_address=results["formatted_address"].to_numpy()))
+
+    aligned = results.reindex(pd.MultiIndex.from_frame(df[key_columns]))
+    return df.assign(**{col: aligned[col].to_numpy() for col in EMPTY_RESULT})
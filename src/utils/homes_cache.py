@@ -0,0 +1,66 @@
+import os
+import json
+import logging
+
+from config import data_storage
+from utils.homes_data import HOMES_DTYPES, HOMES_KEY, compact_homes, homes_csv_paths, load_homes_csvs
+from utils.homes_store import read_homes_parquet, write_homes_parquet
+
+SOURCES_METADATA_KEY = "homes_sources"
+
+def source_fingerprint(paths):
+    """
+    Describes the source files of a cache by path, size and modification time, together with the
+    sale key and schema the cache was built with, so a cache from an older schema is rebuilt.
+
+    Returns:
+    - str: JSON of the key, the dtypes and a [path, size, mtime_ns] list in the order of `paths`.
+    """
+    entries = []
+    for path in paths:
+        stat = os.stat(path)
+        entries.append([path, stat.st_size, stat.st_mtime_ns])
+    return json.dumps({"key": HOMES_KEY, "dtypes": HOMES_DTYPES, "files": entries})
+
+def cached_fingerprint(cache_path):
+    """Returns the source fingerprint stored in a cache file, or None if there is no usable cache."""
+    import pyarrow.parquet as pq
+
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable homes cache {cache_path}: {e}")
+        return None
+    fingerprint = metadata.get(SOURCES_METADATA_KEY.encode())
+    return fingerprint.decode() if fingerprint is not None else None
+
+def load_homes_cached(patterns=None, cache_path=None, compact=True, workers=None, refresh=False):
+    """
+    Loads every historical homes CSV into the canonical schema, from a Parquet cache when none of
+    the source files changed since it was written.
+
+    Parameters:
+    - patterns (list of str): Glob patterns of the CSVs. Defaults to `data_storage["homes_sources"]`.
+    - cache_path (str): Cache file. Defaults to `data_storage["homes_cache"]`.
+    - compact (bool): Whether to store low-cardinality text as categoricals. Default is True.
+    - workers (int): Processes used to read the CSVs on a cache miss. Defaults to the number of CPU cores.
+    - refresh (bool): Whether to rebuild the cache even if it is fresh. Default is False.
+
+    Returns:
+    - pd.DataFrame: The homes in the `HOMES_DTYPES` schema, one row per parcel number, transfer date
+      and conveyance number.
+    """
+    patterns = patterns or data_storage["homes_sources"]
+    cache_path = cache_path or data_storage["homes_cache"]
+    fingerprint = source_fingerprint(homes_csv_paths(patterns))
+
+    if not refresh and cached_fingerprint(cache_path) == fingerprint:
+        logging.info(f"Loading homes from cache {cache_path}.")
+        homes = read_homes_parquet(cache_path)
+    else:
+        logging.info(f"Rebuilding homes cache {cache_path} from {patterns}.")
+        homes = load_homes_csvs(patterns, compact=False, workers=workers)
+        write_homes_parquet(homes, cache_path, metadata={SOURCES_METADATA_KEY: fingerprint})
+    return compact_homes(homes) if compact else homes
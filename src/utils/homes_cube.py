@@ -0,0 +1,200 @@
+import os
+import logging
+import itertools
+import pandas as pd
+
+from config import data_storage
+from utils.homes_store import HomesStore
+
+# Rolled-up rows of the cube use these in place of a month, district or bedroom bucket
+ALL = "ALL"
+ALL_MONTHS = 0
+CUBE_DIMENSIONS = ["year", "month", "school_district", "bedroom_bucket"]
+CUBE_MEASURES = ["sales", "median_price", "p25_price", "p75_price", "median_price_per_sqft", "median_days_held"]
+CUBE_COLUMNS = ["parcel_number", "transfer_date", "amount", "finsqft", "bedrooms", "school_district"]
+BEDROOM_BUCKETS = {"0-1": (0, 1), "2": (2, 2), "3": (3, 3), "4": (4, 4), "5+": (5, 127)}
+
+def bedroom_buckets(bedrooms):
+    """
+    Groups bedroom counts into the buckets of `BEDROOM_BUCKETS`.
+
+    Returns:
+    - pd.Series: Bucket labels, "UNKNOWN" where the count is missing.
+    """
+    labels = pd.Series("UNKNOWN", index=bedrooms.index, dtype="string")
+    for label, (low, high) in BEDROOM_BUCKETS.items():
+        labels = labels.mask(bedrooms.between(low, high).fillna(False), label)
+    return labels
+
+def days_held(parcels, dates):
+    """
+    Days since each sale's parcel was last sold, <NA> for the first recorded sale of a parcel.
+
+    Parameters:
+    - parcels (pd.Series): Parcel number of each sale.
+    - dates (pd.Series): Transfer date of each sale.
+    """
+    sales = pd.DataFrame({"parcel": parcels, "date": dates}).sort_values(["parcel", "date"])
+    held = sales.groupby("parcel", sort=False)["date"].diff().dt.days
+    return held.reindex(parcels.index).astype("Int32")
+
+def aggregate_sales(sales):
+    """
+    Aggregates sales into cube rows for every combination of the dimensions, including the rows
+    rolled up over month, district and bedroom bucket.
+
+    Parameters:
+    - sales (pd.DataFrame): One row per sale with the `CUBE_DIMENSIONS` and `amount`,
+      `price_per_sqft` and `days_held` columns.
+
+    Returns:
+    - pd.DataFrame: One row per group with the sale count and the price and holding measures,
+      empty when there are no sales.
+    """
+    if sales.empty:
+        return pd.DataFrame(columns=CUBE_DIMENSIONS + CUBE_MEASURES)
+    rollups = {"month": ALL_MONTHS, "school_district": ALL, "bedroom_bucket": ALL}
+    cubes = []
+    for rolled_up in itertools.product([False, True], repeat=len(rollups)):
+        keys = ["year"] + [dimension for dimension, rolled in zip(rollups, rolled_up) if not rolled]
+        groups = sales.groupby(keys, observed=True, sort=False)
+        # Built-in group-by reductions only; a Python function per group is far slower
+        prices = groups["amount"].quantile([0.25, 0.5, 0.75]).unstack()
+        cube = pd.DataFrame({
+            "sales": groups.size(),
+            "median_price": prices[0.5],
+            "p25_price": prices[0.25],
+            "p75_price": prices[0.75],
+            "median_price_per_sqft": groups["price_per_sqft"].median(),
+            "median_days_held": groups["days_held"].median(),
+        }).reset_index()
+        for dimension, rolled in zip(rollups, rolled_up):
+            if rolled:
+                cube[dimension] = rollups[dimension]
+        cubes.append(cube[CUBE_DIMENSIONS + CUBE_MEASURES])
+    return pd.concat(cubes, ignore_index=True)
+
+class HomesCube:
+    """
+    Pre-aggregated sales statistics of the homes dataset for dashboard queries: sale count, price
+    median and quartiles, median price per finished square foot and median days since the
+    parcel's previous sale, per year, month, school district and bedroom bucket.
+
+    Each year also has rows rolled up over months (month 0), districts and bedroom buckets
+    ("ALL"), so every dropdown combination is a single row lookup.
+
+    Parameters:
+    - path (str): Parquet file of the cube. Defaults to `data_storage["homes_cube"]`.
+    - store (HomesStore): Dataset the cube is built from. Defaults to `HomesStore()`.
+    """
+
+    def __init__(self, path=None, store=None):
+        self.path = path or data_storage["homes_cube"]
+        self.store = store or HomesStore()
+        self._cube = None
+
+    @property
+    def cube(self):
+        """The materialized cube, read once and kept in memory."""
+        if self._cube is None:
+            if os.path.exists(self.path):
+                self._cube = pd.read_parquet(self.path)
+            else:
+                logging.warning(f"No cube found at {self.path}. Run `python -m utils.homes_cube` to build it.")
+                self._cube = pd.DataFrame(columns=CUBE_DIMENSIONS)
+            self._cube = self._cube.set_index(CUBE_DIMENSIONS).sort_index()
+        return self._cube
+
+    def _sales(self, years=None):
+        # The previous sale of a parcel can be in any year, so holding times use every sale
+        # A multi-conveyance sale is one holding period, so each parcel and date is counted once
+        history = self.store.read(columns=["parcel_number", "transfer_date"]).drop_duplicates(ignore_index=True)
+        held = days_held(history["parcel_number"], history["transfer_date"])
+        history = history.assign(days_held=held)
+        if years is not None:
+            history = history[history["transfer_date"].dt.year.isin(years)]
+
+        sales = self.store.read(years=years, columns=CUBE_COLUMNS)
+        sales = sales.merge(history, on=["parcel_number", "transfer_date"], how="left", validate="many_to_one")
+        finsqft = sales["finsqft"].mask(sales["finsqft"] <= 0)
+        return pd.DataFrame({
+            "year": sales["transfer_date"].dt.year.astype("Int16"),
+            "month": sales["transfer_date"].dt.month.astype("Int8"),
+            "school_district": sales["school_district"].fillna("UNKNOWN"),
+            "bedroom_bucket": bedroom_buckets(sales["bedrooms"]),
+            "amount": sales["amount"].astype("Float64"),
+            "price_per_sqft": sales["amount"] / finsqft,
+            "days_held": sales["days_held"].astype("Float64"),
+        })
+
+    def _write(self, cube):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        cube.to_parquet(temp_path, index=False)
+        os.replace(temp_path, self.path)
+        self._cube = None
+
+    def build(self):
+        """
+        Rebuilds the whole cube from the homes dataset.
+
+        Returns:
+        - int: Number of cube rows.
+        """
+        cube = aggregate_sales(self._sales())
+        self._write(cube)
+        logging.info(f"Built the homes cube with {len(cube)} rows at {self.path}.")
+        return len(cube)
+
+    def refresh(self, years):
+        """
+        Recomputes the cube rows of the given years, e.g. the years just scraped, and keeps the rest.
+
+        Days held in later years depend on the sales of earlier ones, so every stored year from the
+        earliest given year onward is recomputed.
+
+        Returns:
+        - int: Number of cube rows written for the recomputed years.
+        """
+        years = {int(year) for year in years}
+        if not years:
+            return 0
+        if not os.path.exists(self.path):
+            return self.build()
+        first = min(years)
+        years = sorted(years | {year for year, _, _ in self.store.partitions() if year >= first})
+        kept = pd.read_parquet(self.path)
+        kept = kept[kept["year"] < first]
+        updated = aggregate_sales(self._sales(years))
+        self._write(pd.concat([kept, updated], ignore_index=True) if not updated.empty else kept)
+        logging.info(f"Refreshed {len(updated)} cube rows for {years}.")
+        return len(updated)
+
+    def lookup(self, year=None, month=None, school_district=None, bedroom_bucket=None):
+        """
+        Answers a dashboard query from the cube.
+
+        Parameters:
+        - year (int): Transfer year. Defaults to every year.
+        - month (int): Transfer month. Defaults to the whole year.
+        - school_district (str): District, e.g. "SYCAMORE CSD". Defaults to every district.
+        - bedroom_bucket (str): One of `BEDROOM_BUCKETS`, or "UNKNOWN". Defaults to every bucket.
+
+        Returns:
+        - pd.DataFrame: The matching cube rows, one per year when `year` is not given.
+        """
+        # Lists keep every level in the result, so a single match is still a one-row frame
+        key = (
+            slice(None) if year is None else [int(year)],
+            [ALL_MONTHS if month is None else int(month)],
+            [ALL if school_district is None else school_district],
+            [ALL if bedroom_bucket is None else bedroom_bucket],
+        )
+        try:
+            return self.cube.loc[key, :].reset_index()
+        except KeyError:
+            return self.cube.iloc[:0].reset_index()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    print(f"cube rows: {HomesCube().build()}")
@@ -0,0 +1,361 @@
+import glob
+import logging
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+# Canonical columns and dtypes of the homes dataset, in the column order of the scraped CSVs.
+HOMES_DTYPES = {
+    "parcel_number": "string",
+    "address": "string",
+    "bbb": "string",
+    "finsqft": "Int32",
+    "use": "Int16",
+    "year_built": "Int16",
+    "transfer_date": "datetime64[ns]",
+    "amount": "Int64",
+    "total_rooms": "Int8",
+    "bedrooms": "Int8",
+    "full_baths": "Int8",
+    "half_baths": "Int8",
+    "conveyance_number": "string",
+    "deed_type": "string",
+    "acreage": "float64",
+    "school_district": "string",
+    "owner_address": "string",
+    "owner_street_address": "string",
+    "owner_city": "string",
+    "owner_state": "string",
+    "owner_postal_code": "string",
+    "owner_home_address_match": "string",
+    "st_num": "string",
+    "apt_num": "string",
+    "street": "string",
+    "city": "string",
+    "state": "string",
+    "new_address": "string",
+}
+# A sale is identified by its parcel, transfer date and conveyance number, since one parcel can
+# change hands more than once on the same day. Rows need at least the parcel and date.
+HOMES_KEY = ["parcel_number", "transfer_date", "conveyance_number"]
+REQUIRED_KEY = ["parcel_number", "transfer_date"]
+# Low-cardinality text columns kept as categoricals in memory, e.g. 23 school districts across 30,000 sales.
+HOMES_CATEGORIES = [
+    "bbb", "deed_type", "school_district", "owner_city", "owner_state",
+    "owner_home_address_match", "city", "state",
+]
+# "bbb" holds total rooms, bedrooms, full baths and half baths, e.g. "6 - 3 - 1 - 0"
+BBB_COLUMNS = ["total_rooms", "bedrooms", "full_baths", "half_baths"]
+
+# Column names of the Title-Case layout of finalsold2013_2023.csv and homessold2013_2023.csv
+TITLE_CASE_COLUMNS = {
+    "Parcel Number": "parcel_number",
+    "Address": "address",
+    "BBB": "bbb",
+    "FinSqFt": "finsqft",
+    "Use": "use",
+    "Year Built": "year_built",
+    "Transfer Date": "transfer_date",
+    "Amount": "amount",
+    "School District": "school_district",
+}
+# Long district names of the Title-Case layout, e.g. "Madeira City School District" for "MADEIRA CSD"
+DISTRICT_SUFFIXES = {
+    r"(?: COMMUNITY)? CITY SCHOOL DISTRICT$": " CSD",
+    r" LOCAL SCHOOL DISTRICT$": " LSD",
+    r" EX(?:EMPTED)? VILL(?:AGE)? SCHOOL DISTRICT$": " EVSD",
+}
+# Every column read from any homes CSV layout; the rest are skipped while parsing.
+SOURCE_COLUMNS = set(HOMES_DTYPES) | set(TITLE_CASE_COLUMNS) | {"selling_price", "conveyance_"}
+
+# Transfer dates are written as "01-08-2021" by the scraper, but older files were re-saved as "1/8/2021".
+TRANSFER_DATE_FORMATS = ["%m-%d-%Y", "%m/%d/%Y", "%Y-%m-%d"]
+
+def parse_transfer_dates(dates):
+    """
+    Parses transfer dates written in any of the formats found in the stored CSVs.
+
+    Parameters:
+    - dates (pd.Series): Transfer date strings.
+
+    Returns:
+    - pd.Series: datetime64 values, NaT where a date could not be parsed.
+    """
+    dates = dates.astype("string").str.strip()
+    parsed = pd.Series(pd.NaT, index=dates.index, dtype="datetime64[ns]")
+    for date_format in TRANSFER_DATE_FORMATS:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(dates[missing], format=date_format, errors="coerce")
+    return parsed
+
+def parse_amounts(amounts):
+    """
+    Parses sale amounts such as "$175,000 " into whole dollars.
+
+    Returns:
+    - pd.Series: Int64 values, <NA> where an amount has no digits.
+    """
+    digits = amounts.astype("string").str.replace(r"[^0-9]", "", regex=True)
+    return pd.to_numeric(digits.mask(digits == ""), errors="coerce").astype("Int64")
+
+def transfer_keys(parcels, transfer_dates, amounts):
+    """
+    Builds the (parcel, transfer date, amount) key of each transfer, normalized so that the
+    results table and the stored CSVs produce the same key for the same sale.
+
+    Returns:
+    - list of tuples: (parcel number, "YYYY-MM-DD" or None, amount in dollars or None) per row.
+    """
+    parcels = parcels.astype("string").str.strip()
+    dates = parse_transfer_dates(transfer_dates).dt.strftime("%Y-%m-%d")
+    amounts = parse_amounts(amounts)
+    return [
+        (parcel, None if pd.isna(date) else date, None if pd.isna(amount) else int(amount))
+        for parcel, date, amount in zip(parcels, dates, amounts)
+    ]
+
+class StoredTransfers:
+    """
+    Index of the transfers already saved, used to scrape only new or changed sales.
+
+    Parameters:
+    - keys (iterable of tuple): Transfer keys from `transfer_keys`.
+    """
+
+    def __init__(self, keys=()):
+        self.keys = set(keys)
+
+    @classmethod
+    def from_csvs(cls, patterns):
+        """
+        Builds the index from saved homes CSVs.
+
+        Parameters:
+        - patterns (list of str): Glob patterns of CSVs with parcel_number, transfer_date and amount columns.
+        """
+        index = cls()
+        paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+        for path in paths:
+            index.add(pd.read_csv(path, dtype=str, usecols=["parcel_number", "transfer_date", "amount"]))
+        logging.info(f"Indexed {len(index.keys)} stored transfers from {len(paths)} files.")
+        return index
+
+    @classmethod
+    def from_store(cls, store):
+        """Builds the index from the homes Parquet dataset."""
+        index = cls()
+        index.add(store.read(columns=["parcel_number", "transfer_date", "amount"]))
+        logging.info(f"Indexed {len(index.keys)} stored transfers from {store.root}.")
+        return index
+
+    def add(self, df):
+        """Adds the transfers of a DataFrame in the saved homes format."""
+        self.keys.update(transfer_keys(df["parcel_number"], df["transfer_date"], df["amount"]))
+
+    def is_new(self, results):
+        """
+        Flags the rows of a results table whose transfer is not stored yet.
+
+        Parameters:
+        - results (pd.DataFrame): Results table with "Parcel Number", "Transfer Date" and "Amount" columns.
+
+        Returns:
+        - list of bool: True for each row that still needs its details scraped.
+        """
+        keys = transfer_keys(results["Parcel Number"], results["Transfer Date"], results["Amount"])
+        return [key not in self.keys for key in keys]
+
+def split_bbb(bbb):
+    """
+    Splits "rooms - bedrooms - full baths - half baths" strings into their counts.
+
+    Returns:
+    - pd.DataFrame: One Int8 column per entry of `BBB_COLUMNS`, <NA> where a part is missing.
+    """
+    parts = bbb.astype("string").str.extract(r"^\s*(\d+)\s*-\s*(\d+)\s*-\s*(\d+)\s*-\s*(\d+)\s*$")
+    parts.columns = BBB_COLUMNS
+    return parts.apply(pd.to_numeric).astype("Int8")
+
+def harmonize_homes(df):
+    """
+    Renames the columns of an older homes CSV layout to the canonical ones.
+
+    The "House Sales" files (2011 onwards) store the transfer tab's last sale next to the search
+    results. Their `transfer_date`, `selling_price` and `conveyance_` describe the same sale, so
+    those are kept as the transfer date, amount and conveyance number.
+
+    The Title-Case files hold geocoded addresses such as "411 Washington Ave, Terrace Park, OH
+    45174, USA" and long district names, which are cut back to the scraped "411 WASHINGTON AVE"
+    and "MARIEMONT CSD" forms.
+
+    Returns:
+    - pd.DataFrame: `df` with canonical column names. Columns outside the schema are left in place.
+    """
+    df = df.drop(columns=[col for col in df.columns if col.startswith("Unnamed:")])
+    if "selling_price" in df.columns:
+        df = df.drop(columns=[col for col in ["amount", "conveyance_number"] if col in df.columns])
+        df = df.rename(columns={"selling_price": "amount", "conveyance_": "conveyance_number"})
+    if "Parcel Number" in df.columns:
+        df = df.rename(columns=TITLE_CASE_COLUMNS)
+        df["address"] = df["address"].astype("string").str.split(",").str[0].str.upper()
+        if "school_district" in df.columns:
+            districts = df["school_district"].astype("string").str.upper()
+            for suffix, short in DISTRICT_SUFFIXES.items():
+                districts = districts.str.replace(suffix, short, regex=True)
+            df["school_district"] = districts
+    return df
+
+def enforce_homes_schema(df):
+    """
+    Converts homes data to the canonical columns and dtypes of `HOMES_DTYPES`.
+
+    Amounts are parsed to whole dollars, transfer dates to datetime64 and counts to integers. Room
+    counts missing from the appraisal columns are filled in from `bbb`. Columns outside the schema
+    are dropped, missing ones are added as empty, and rows without a parcel number or transfer
+    date are dropped because they cannot be keyed.
+
+    Parameters:
+    - df (pd.DataFrame): Homes data in the scraped CSV format, e.g. read with dtype=str.
+
+    Returns:
+    - pd.DataFrame: A new DataFrame with exactly the columns of `HOMES_DTYPES`.
+    """
+    df = harmonize_homes(df)
+    extra = [col for col in df.columns if col not in HOMES_DTYPES]
+    if extra:
+        logging.debug(f"Dropping columns outside the homes schema: {extra}")
+
+    typed = {}
+    for column, dtype in HOMES_DTYPES.items():
+        values = df[column] if column in df.columns else pd.Series(pd.NA, index=df.index)
+        if column == "transfer_date":
+            typed[column] = values if pd.api.types.is_datetime64_any_dtype(values) else parse_transfer_dates(values)
+        elif column == "amount":
+            typed[column] = values.astype("Int64") if pd.api.types.is_integer_dtype(values) else parse_amounts(values)
+        elif dtype == "string":
+            values = values.astype("string").str.strip()
+            typed[column] = values.mask(values == "")
+        else:
+            # Older files saved counts as floats, e.g. "128542.0"
+            numbers = pd.to_numeric(values, errors="coerce")
+            if dtype != "float64":
+                # Values that cannot fit, e.g. from rows shifted by a bad merge, are treated as missing
+                bounds = np.iinfo(dtype.lower())
+                out_of_range = (numbers < bounds.min) | (numbers > bounds.max)
+                if out_of_range.any():
+                    logging.warning(f"Dropping {int(out_of_range.sum())} out of range values of {column}.")
+                numbers = numbers.mask(out_of_range).round().astype(dtype)
+            typed[column] = numbers
+    typed = pd.DataFrame(typed, index=df.index)
+
+    typed["conveyance_number"] = typed["conveyance_number"].str.replace(r"\.0$", "", regex=True)
+    rooms = split_bbb(typed["bbb"])
+    for column in BBB_COLUMNS:
+        typed[column] = typed[column].fillna(rooms[column])
+
+    unkeyed = typed[REQUIRED_KEY].isna().any(axis=1)
+    if unkeyed.any():
+        logging.warning(f"Dropping {int(unkeyed.sum())} rows without a parcel number or transfer date.")
+        typed = typed[~unkeyed]
+    return typed.reset_index(drop=True)
+
+def compact_homes(df):
+    """
+    Converts the low-cardinality text columns of typed homes data to categoricals, which cuts
+    memory use and speeds up grouping by district, deed type or city.
+
+    Parameters:
+    - df (pd.DataFrame): Homes data in the `HOMES_DTYPES` schema.
+
+    Returns:
+    - pd.DataFrame: A copy with the columns of `HOMES_CATEGORIES` as categoricals.
+    """
+    columns = {column: "category" for column in HOMES_CATEGORIES if column in df.columns}
+    return df.astype(columns)
+
+def read_homes_csv(path):
+    """
+    Reads one homes CSV of any layout into the `HOMES_DTYPES` schema, parsing only the columns the
+    schema uses.
+    """
+    df = pd.read_csv(path, dtype=str, usecols=lambda column: column in SOURCE_COLUMNS)
+    return enforce_homes_schema(df)
+
+def homes_csv_paths(patterns):
+    """Expands glob patterns into file paths, keeping the order of the patterns."""
+    return [path for pattern in patterns for path in sorted(glob.glob(pattern))]
+
+def load_homes_csvs(patterns, compact=True, workers=None):
+    """
+    Loads homes CSVs of every layout into one typed DataFrame.
+
+    Files are read in parallel processes and combined in the order of `patterns`, so for a sale
+    found in several files the row from the last file wins.
+
+    Parameters:
+    - patterns (list of str): Glob patterns of the CSV files to read, e.g. ["../data/raw/[0-9]* Homes.csv"].
+    - compact (bool): Whether to store low-cardinality text as categoricals. Default is True.
+    - workers (int): Number of processes reading files. Defaults to the number of CPU cores.
+
+    Returns:
+    - pd.DataFrame: The homes in the `HOMES_DTYPES` schema, one row per parcel number, transfer date
+      and conveyance number.
+    """
+    paths = homes_csv_paths(patterns)
+    workers = min(workers or multiprocessing.cpu_count(), len(paths))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            frames = list(executor.map(read_homes_csv, paths))
+    else:
+        frames = [read_homes_csv(path) for path in paths]
+
+    if not frames:
+        logging.warning(f"No homes CSVs found in {patterns}.")
+        homes = pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in HOMES_DTYPES.items()})
+    else:
+        homes = pd.concat(frames, ignore_index=True)
+        homes = homes.drop_duplicates(subset=HOMES_KEY, keep="last", ignore_index=True)
+        homes = drop_unconveyed_duplicates(homes).reset_index(drop=True)
+    return compact_homes(homes) if compact else homes
+
+def drop_unconveyed_duplicates(df):
+    """
+    Drops rows without a conveyance number whose parcel and transfer date also have a row with
+    one, e.g. a sale saved from the results table before its property details arrived.
+
+    Parameters:
+    - df (pd.DataFrame): Homes in the `HOMES_DTYPES` schema.
+
+    Returns:
+    - pd.DataFrame: `df` without the superseded rows.
+    """
+    conveyed = pd.MultiIndex.from_frame(df.loc[df["conveyance_number"].notna(), REQUIRED_KEY])
+    superseded = df["conveyance_number"].isna() & pd.MultiIndex.from_frame(df[REQUIRED_KEY]).isin(conveyed)
+    return df[~superseded.to_numpy()]
+
+def sale_key_hashes(df):
+    """
+    Hashes the sale key (`HOMES_KEY`) of homes rows of any CSV layout, normalized so the same sale
+    gets the same hash whichever file or date format it came from.
+
+    Parameters:
+    - df (pd.DataFrame): Homes rows, as read from a CSV or already in the `HOMES_DTYPES` schema.
+
+    Returns:
+    - pd.Series: One uint64 hash per row, aligned with `df`.
+    """
+    df = harmonize_homes(df)
+    missing = pd.Series(pd.NA, index=df.index, dtype="string")
+    dates = df["transfer_date"] if "transfer_date" in df.columns else missing
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = parse_transfer_dates(dates)
+    conveyance = df["conveyance_number"] if "conveyance_number" in df.columns else missing
+    key = pd.DataFrame({
+        "parcel_number": df["parcel_number"].astype("string").str.strip(),
+        "transfer_date": dates.dt.strftime("%Y-%m-%d"),
+        "conveyance_number": conveyance.astype("string").str.strip().str.replace(r"\.0$", "", regex=True),
+    }, index=df.index)
+    return pd.util.hash_pandas_object(key, index=False)
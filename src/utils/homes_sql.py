@@ -0,0 +1,124 @@
+import os
+import logging
+import threading
+
+from config import data_storage
+from utils.homes_store import HomesStore, homes_arrow_schema
+
+# Columns returned by `HomesSQL.sales` unless others are asked for
+SALES_COLUMNS = ["parcel_number", "address", "transfer_date", "amount", "bedrooms", "finsqft", "school_district"]
+
+class HomesSQL:
+    """
+    SQL access to the homes Parquet dataset through an embedded DuckDB database, without loading
+    the dataset into memory first.
+
+    The `homes` view reads the partitions in place, with `year` and `month` columns taken from the
+    partition folders. DuckDB only opens the partitions that match filters on `year`/`month` and
+    only decodes the columns a query uses. The `homes_cube` view exposes the `HomesCube`
+    statistics when the cube has been built. The views are re-created when partitions or the cube
+    appear after the connection was opened.
+
+    Parameters:
+    - store (HomesStore): Dataset to query. Defaults to `HomesStore()`.
+    - cube_path (str): Cube file for the `homes_cube` view. Defaults to `data_storage["homes_cube"]`.
+    """
+
+    def __init__(self, store=None, cube_path=None):
+        import duckdb
+
+        self.store = store or HomesStore()
+        self.cube_path = cube_path or data_storage["homes_cube"]
+        self._conn = duckdb.connect()
+        self._lock = threading.Lock()
+        self._sources = None
+        self._create_views()
+
+    def _create_views(self):
+        """Creates the views for the partitions and cube found on disk, if they changed since the last call."""
+        sources = (bool(self.store.partitions()), os.path.exists(self.cube_path))
+        with self._lock:
+            if sources == self._sources:
+                return
+            has_partitions, has_cube = sources
+            if has_partitions:
+                # The glob is expanded on every query, so partitions written later are read too
+                pattern = os.path.join(self.store.root, "year=*", "month=*", "homes.parquet").replace("\\", "/")
+                self._conn.execute(
+                    f"CREATE OR REPLACE VIEW homes AS SELECT * FROM read_parquet('{pattern}', hive_partitioning = true)"
+                )
+            else:
+                logging.warning(f"No homes found in {self.store.root}. Run `python -m utils.homes_store` to migrate the homes CSVs.")
+                # Registered tables are not visible to cursors, so the empty schema is copied into a table
+                self._conn.register("empty_arrow", homes_arrow_schema().empty_table())
+                self._conn.execute("CREATE OR REPLACE TABLE empty_homes AS SELECT * FROM empty_arrow")
+                self._conn.unregister("empty_arrow")
+                self._conn.execute(
+                    "CREATE OR REPLACE VIEW homes AS SELECT *, NULL::BIGINT AS year, NULL::BIGINT AS month FROM empty_homes"
+                )
+            if has_cube:
+                self._conn.execute(
+                    f"CREATE OR REPLACE VIEW homes_cube AS SELECT * FROM read_parquet('{self.cube_path.replace(chr(92), '/')}')"
+                )
+            self._sources = sources
+
+    def query(self, sql, params=None):
+        """
+        Runs a SQL query against the `homes` and `homes_cube` views.
+
+        Each call uses its own cursor, so queries can be made from several threads, e.g. concurrent
+        dashboard callbacks.
+
+        Parameters:
+        - sql (str): The query, with `?` placeholders for `params`.
+        - params (list): Values of the placeholders.
+
+        Returns:
+        - pd.DataFrame: The result.
+        """
+        self._create_views()
+        with self._conn.cursor() as cursor:
+            return cursor.execute(sql, params or []).df()
+
+    def sales(self, years=None, school_districts=None, min_price=None, max_price=None, columns=None):
+        """
+        Selects sales for a dashboard view, e.g. 2021-2024 sales in SYCAMORE CSD over $500k.
+
+        Parameters:
+        - years (iterable of int): Transfer years. Defaults to every year; an empty list matches no sales.
+        - school_districts (iterable of str): Districts such as "SYCAMORE CSD". Defaults to every
+          district; an empty list matches no sales.
+        - min_price (int): Lowest amount, inclusive.
+        - max_price (int): Highest amount, inclusive.
+        - columns (list of str): Columns to return. Defaults to `SALES_COLUMNS`.
+
+        Returns:
+        - pd.DataFrame: The matching sales by transfer date.
+        """
+        conditions, params = [], []
+        for column, values in (("year", years), ("school_district", school_districts)):
+            if values is None:
+                continue
+            values = [int(value) for value in values] if column == "year" else list(values)
+            # An empty selection, e.g. a dropdown with nothing picked, matches nothing; `IN ()` is not valid SQL
+            conditions.append(f"{column} IN ({', '.join('?' for _ in values)})" if values else "FALSE")
+            params.extend(values)
+        if min_price is not None:
+            conditions.append("amount >= ?")
+            params.append(int(min_price))
+        if max_price is not None:
+            conditions.append("amount <= ?")
+            params.append(int(max_price))
+
+        selected = ", ".join(f'"{column}"' for column in columns or SALES_COLUMNS)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.query(f"SELECT {selected} FROM homes {where} ORDER BY transfer_date, parcel_number", params)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,212 @@
+import os
+import glob
+import logging
+import pandas as pd
+
+from config import data_storage
+from utils.homes_data import (
+    HOMES_DTYPES, HOMES_KEY, enforce_homes_schema, compact_homes, read_homes_csv, homes_csv_paths,
+    drop_unconveyed_duplicates,
+)
+
+def homes_arrow_schema():
+    """Returns the pyarrow schema matching `HOMES_DTYPES`."""
+    import pyarrow as pa
+
+    arrow_types = {
+        "string": pa.string(),
+        "Int8": pa.int8(),
+        "Int16": pa.int16(),
+        "Int32": pa.int32(),
+        "Int64": pa.int64(),
+        "float64": pa.float64(),
+        "datetime64[ns]": pa.timestamp("ns"),
+    }
+    return pa.schema([(column, arrow_types[dtype]) for column, dtype in HOMES_DTYPES.items()])
+
+def read_homes_parquet(path, columns=None):
+    """Reads a Parquet file written by `write_homes_parquet` with the dtypes of `HOMES_DTYPES`."""
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path, columns=columns, schema=homes_arrow_schema())
+    return table.to_pandas(types_mapper=_pandas_type)
+
+def write_homes_parquet(df, path, metadata=None):
+    """
+    Writes homes in the `HOMES_DTYPES` schema to a Parquet file. The file is written next to `path`
+    and then swapped in, so readers never see a half-written file.
+
+    Parameters:
+    - df (pd.DataFrame): Homes in the `HOMES_DTYPES` schema.
+    - path (str): File to write.
+    - metadata (dict): Optional str to str entries stored in the file's schema metadata.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table = pa.Table.from_pandas(df, schema=homes_arrow_schema(), preserve_index=False)
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    temp_path = f"{path}.tmp"
+    pq.write_table(table, temp_path, compression="zstd")
+    os.replace(temp_path, path)
+
+class HomesStore:
+    """
+    Parquet dataset of homes partitioned by transfer year and month, e.g.
+    `{root}/year=2024/month=01/homes.parquet`.
+
+    Every write is checked against the homes schema and upserted on parcel number, transfer date
+    and conveyance number, so saving the same sales again replaces them instead of adding
+    duplicates. Each partition is rewritten to a temporary file and then swapped in, so readers
+    never see a half-written partition.
+
+    Parameters:
+    - root (str): Folder of the dataset. Defaults to `data_storage["homes_lake"]`.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or data_storage["homes_lake"]
+
+    def partition_path(self, year, month):
+        return os.path.join(self.root, f"year={year}", f"month={month:02d}", "homes.parquet")
+
+    def partitions(self, years=None, months=None):
+        """
+        Lists the stored partitions.
+
+        Returns:
+        - list of tuples: (year, month, path) in date order.
+        """
+        found = []
+        for path in glob.glob(os.path.join(self.root, "year=*", "month=*", "homes.parquet")):
+            month_dir = os.path.dirname(path)
+            year = int(os.path.basename(os.path.dirname(month_dir)).split("=")[1])
+            month = int(os.path.basename(month_dir).split("=")[1])
+            if (years is None or year in years) and (months is None or month in months):
+                found.append((year, month, path))
+        return sorted(found)
+
+    def upsert(self, df):
+        """
+        Saves homes to the dataset, replacing stored rows with the same parcel number, transfer date
+        and conveyance number. Rows without a conveyance number are dropped once their parcel and
+        transfer date have a row with one, so a sale saved before its details arrived is not kept
+        twice.
+
+        Parameters:
+        - df (pd.DataFrame): Homes in the scraped CSV format or already in the homes schema.
+
+        Returns:
+        - dict: Rows received, rows added, rows replaced and partitions written.
+        """
+        homes = enforce_homes_schema(df).drop_duplicates(subset=HOMES_KEY, keep="last")
+        homes = drop_unconveyed_duplicates(homes)
+        stats = {"rows": len(df), "added": 0, "replaced": 0, "partitions": 0}
+
+        dates = homes["transfer_date"]
+        for (year, month), new_rows in homes.groupby([dates.dt.year, dates.dt.month], sort=True):
+            path = self.partition_path(int(year), int(month))
+            if os.path.exists(path):
+                stored = read_homes_parquet(path)
+                combined = pd.concat([stored, new_rows], ignore_index=True)
+                combined = drop_unconveyed_duplicates(combined.drop_duplicates(subset=HOMES_KEY, keep="last"))
+                added = len(combined) - len(stored)
+                stats["added"] += added
+                stats["replaced"] += len(new_rows) - added
+            else:
+                stats["added"] += len(new_rows)
+                combined = new_rows
+            write_homes_parquet(combined.sort_values(HOMES_KEY, ignore_index=True), path)
+            stats["partitions"] += 1
+
+        logging.info(
+            f"Upserted {stats['rows']} homes into {self.root}: {stats['added']} added, "
+            f"{stats['replaced']} replaced across {stats['partitions']} partitions."
+        )
+        return stats
+
+    def read(self, years=None, months=None, columns=None):
+        """
+        Reads homes from the dataset, opening only the partitions of the requested years and months.
+
+        Parameters:
+        - years (iterable of int): Transfer years to read. Defaults to all.
+        - months (iterable of int): Transfer months to read. Defaults to all.
+        - columns (list of str): Columns to read. Defaults to all.
+
+        Returns:
+        - pd.DataFrame: The homes, typed as in `HOMES_DTYPES`.
+        """
+        import pyarrow.dataset as ds
+
+        years = set(years) if years is not None else None
+        months = set(months) if months is not None else None
+        paths = [path for _, _, path in self.partitions(years, months)]
+        if not paths:
+            empty = {column: pd.Series(dtype=dtype) for column, dtype in HOMES_DTYPES.items()}
+            return pd.DataFrame(empty)[columns or list(HOMES_DTYPES)]
+        # The partitions are read together so pyarrow can use several threads
+        table = ds.dataset(paths, schema=homes_arrow_schema(), format="parquet").to_table(columns=columns)
+        return table.to_pandas(types_mapper=_pandas_type)
+
+def _pandas_type(arrow_type):
+    """Maps pyarrow types to the pandas dtypes of `HOMES_DTYPES` when reading partitions."""
+    import pyarrow as pa
+
+    mapping = {
+        pa.string(): pd.StringDtype(),
+        pa.int8(): pd.Int8Dtype(),
+        pa.int16(): pd.Int16Dtype(),
+        pa.int32(): pd.Int32Dtype(),
+        pa.int64(): pd.Int64Dtype(),
+    }
+    return mapping.get(arrow_type)
+
+def load_homes(years=None, months=None, columns=None, store=None):
+    """
+    Loads homes from the Parquet dataset with low-cardinality text as categoricals, for analysis.
+
+    Parameters:
+    - years (iterable of int): Transfer years to load. Defaults to all.
+    - months (iterable of int): Transfer months to load. Defaults to all.
+    - columns (list of str): Columns to load. Defaults to all.
+    - store (HomesStore): Dataset to read. Defaults to `HomesStore()`.
+
+    Returns:
+    - pd.DataFrame: The homes, typed as in `HOMES_DTYPES` apart from the categoricals.
+    """
+    store = store or HomesStore()
+    return compact_homes(store.read(years, months, columns))
+
+def migrate_csvs(store=None, patterns=None):
+    """
+    One-time migration of the homes CSVs into the Parquet dataset.
+
+    Files are loaded in the order of `patterns`, so for a sale found in several files the last
+    one wins. By default the scraped `{year} Homes.csv` files come last.
+
+    Parameters:
+    - store (HomesStore): Dataset to write to. Defaults to `HomesStore()`.
+    - patterns (list of str): Glob patterns of the CSVs. Defaults to `data_storage["migration_sources"]`.
+
+    Returns:
+    - dict: Rows read per file, and the upsert statistics.
+    """
+    store = store or HomesStore()
+    frames, report = [], {}
+    for path in homes_csv_paths(patterns or data_storage["migration_sources"]):
+        homes = read_homes_csv(path)
+        report[path] = len(homes)
+        frames.append(homes)
+    if not frames:
+        logging.warning("No CSVs found to migrate.")
+        return {"files": report}
+    # One upsert writes each partition once, with the later files winning duplicate sales
+    return {"files": report, **store.upsert(pd.concat(frames, ignore_index=True))}
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    for key, value in migrate_csvs().items():
+        print(f"{key}: {value}")
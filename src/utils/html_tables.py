@@ -0,0 +1,75 @@
+import pandas as pd
+from lxml import etree
+
+HTML_PARSER = etree.HTMLParser()
+HEADER_CELLS = etree.XPath("(.//thead/tr)[last()]/th | (.//thead/tr)[last()]/td")
+BODY_ROWS = etree.XPath(".//tbody/tr | ./tr")
+BODY_CELLS = etree.XPath(".//tbody/tr/td | .//tbody/tr/th | ./tr/td | ./tr/th")
+ROW_CELLS = etree.XPath("./td | ./th")
+
+def cell_text(cell):
+    """Returns a cell's text with whitespace collapsed, as `pd.read_html` does."""
+    text = cell.text if len(cell) == 0 else "".join(cell.itertext())
+    return " ".join(text.split()) if text else ""
+
+def table_rows(table):
+    """
+    Reads the body rows of a table element.
+
+    Returns:
+    - list of list of str: The cell texts of each row, in document order.
+    """
+    return [[cell_text(cell) for cell in ROW_CELLS(row)] for row in BODY_ROWS(table)]
+
+def parse_html_table(table_html, columns=None, dtypes=None):
+    """
+    Parses an HTML table with a known layout into a DataFrame, without the type inference of
+    `pd.read_html`.
+
+    Parameters:
+    - table_html (str or lxml element): The table's HTML, e.g. an element's outerHTML.
+    - columns (list of str): Column names to use. Defaults to the table's header cells.
+    - dtypes (dict): Column name to dtype for columns that should not stay strings, e.g.
+      {"FinSqFt": "Int64"}. Thousands separators are removed before numbers are converted.
+
+    Returns:
+    - pd.DataFrame: One row per body row. Empty cells are missing values.
+    """
+    if isinstance(table_html, (str, bytes)):
+        table = etree.fromstring(table_html, HTML_PARSER)
+    else:
+        table = table_html
+    if table.tag != "table":
+        table = table.find(".//table")
+    header = columns or [cell_text(cell) for cell in HEADER_CELLS(table)]
+
+    # Every row of a well-formed table has one cell per column, so all cells can be read in one
+    # pass and split into columns by position. Ragged tables are read row by row.
+    num_rows = len(BODY_ROWS(table))
+    texts = [cell_text(cell) for cell in BODY_CELLS(table)]
+    width = len(header)
+    if width and len(texts) == num_rows * width:
+        data = {header[i]: texts[i::width] for i in range(width)}
+    else:
+        rows = [row for row in table_rows(table) if row]
+        width = width or max((len(row) for row in rows), default=0)
+        data = {
+            (header[i] if header else i): [row[i] if i < len(row) else "" for row in rows]
+            for i in range(width)
+        }
+
+    df = pd.DataFrame(data, dtype=object).replace("", None)
+    for column, dtype in (dtypes or {}).items():
+        if column in df.columns:
+            numbers = pd.to_numeric(df[column].astype("string").str.replace(",", "", regex=False), errors="coerce")
+            df[column] = numbers.astype(dtype)
+    return df
+
+def parse_label_value_table(table):
+    """
+    Reads a two-column label/value table, such as the appraisal table of a property page.
+
+    Returns:
+    - dict: Label to value. Empty values are None.
+    """
+    return {row[0]: (row[1] or None) if len(row) > 1 else None for row in table_rows(table) if row}
@@ -62,8 +62,58 @@ def next_navigation(driver, wait, xpath):
     except NoSuchElementException:
         return False  # "Next" button doesn"t exist
 
-def initialize_search(wait,start,end,ids,values):
-    safe_click(wait,XPATHS["search"]["property_search"])
+def return_to_results(driver, wait, depth=1):
+    """
+    Goes back from a property page to the search results table.
+
+    Parameters:
+    - depth (int): Pages opened since the results table: one for the property opened from the
+      table plus one per "next property" click. Default is 1.
+
+    Returns:
+    - bool: True once the results table is shown, False if it did not come back.
+    """
+    driver.execute_script("window.history.go(arguments[0]);", -depth)
+    try:
+        wait.until(EC.presence_of_element_located((By.XPATH, XPATHS["results"]["results_table"])))
+        return True
+    except TimeoutException as e:
+        logging.warning(f"Results table did not come back after going back {depth} pages: {e}")
+        return False
+
+# Shows every row of a DataTables table on one page. Returns false when the table is not a DataTable.
+SHOW_ALL_ROWS_SCRIPT = """
+var $ = window.jQuery;
+if (!$ || !$.fn.dataTable || !$.fn.dataTable.isDataTable(arguments[0])) { return false; }
+$(arguments[0]).DataTable().page.len(-1).draw(false);
+return true;
+"""
+
+def show_all_results(driver, wait, num_entries):
+    """
+    Sets the search results table's page length to "all" so every result can be read at once.
+
+    Parameters:
+    - num_entries (int): Number of results the search found.
+
+    Returns:
+    - bool: True once all `num_entries` rows are shown, False if the table could not be expanded.
+    """
+    try:
+        table = wait.until(EC.presence_of_element_located((By.XPATH, XPATHS["results"]["results_table"])))
+        if not driver.execute_script(SHOW_ALL_ROWS_SCRIPT, table):
+            logging.info("Results table is not a DataTable. Paging through the results instead.")
+            return False
+        wait.until(lambda d: d.execute_script("return arguments[0].tBodies[0].rows.length;", table) >= num_entries)
+        return True
+    except TimeoutException as e:
+        logging.warning(f"Results table did not show all {num_entries} rows: {e}")
+        return False
+
+def initialize_search(wait,start,end,ids,values,from_home=True):
+    # A reused session may already be on the search form
+    if from_home:
+        safe_click(wait,XPATHS["search"]["property_search"])
     safe_click(wait,XPATHS["search"]["sales_radio_button"]) 
 
     fill_form_field(wait, "sale_date_low", start)
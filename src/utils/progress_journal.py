@@ -0,0 +1,211 @@
+import json
+import time
+import sqlite3
+import logging
+import pandas as pd
+from io import StringIO
+from datetime import timedelta
+
+def _iso(date):
+    return f"{pd.to_datetime(date):%Y-%m-%d}"
+
+def _us(date):
+    return f"{pd.to_datetime(date):%m/%d/%Y}"
+
+class ProgressJournal:
+    """
+    Durable SQLite record of scraping progress, so a restarted run picks up where it stopped.
+
+    The journal records which date slices are finished, the results tables of slices in progress,
+    and the property details already extracted for them. Failed extractions are not recorded, so
+    a resumed slice tries those properties again. Entries are keyed on the search filters,
+    so runs with different filters do not share progress.
+
+    Parameters:
+    - path (str): Path to the SQLite file.
+    - filters (dict): Search filters of the run, e.g. {"sale_price_low": 100000, ...}.
+    """
+
+    def __init__(self, path, filters):
+        self.path = path
+        self.filters = json.dumps(filters, sort_keys=True, default=str)
+        self._conn = sqlite3.connect(path, timeout=30)
+        with self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS slices (
+                    filters TEXT NOT NULL,
+                    start TEXT NOT NULL,
+                    end TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    num_entries INTEGER,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (filters, start, end)
+                );
+                CREATE TABLE IF NOT EXISTS results_pages (
+                    filters TEXT NOT NULL,
+                    start TEXT NOT NULL,
+                    end TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (filters, start, end, page)
+                );
+                CREATE TABLE IF NOT EXISTS property_details (
+                    filters TEXT NOT NULL,
+                    start TEXT NOT NULL,
+                    end TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    parcel_id TEXT,
+                    data TEXT,
+                    PRIMARY KEY (filters, start, end, position)
+                );
+                """
+            )
+
+    def checkpoint(self, start, end):
+        """Returns the checkpoint of one date slice."""
+        return SliceCheckpoint(self, start, end)
+
+    def _slices(self, start, end, statuses):
+        placeholders = ", ".join("?" for _ in statuses)
+        rows = self._conn.execute(
+            f"SELECT start, end FROM slices WHERE filters = ? AND start >= ? AND end <= ? "
+            f"AND status IN ({placeholders}) ORDER BY start, updated_at DESC",
+            (self.filters, _iso(start), _iso(end), *statuses),
+        ).fetchall()
+        return [(pd.to_datetime(first), pd.to_datetime(last)) for first, last in rows]
+
+    def remaining_slices(self, start, end, planner=None):
+        """
+        Works out the slices of a date range that still need scraping.
+
+        Finished slices are skipped. A slice that was interrupted is resumed with its original
+        boundaries so its checkpoint is reused, and the rest of each gap is planned with `planner`.
+
+        Parameters:
+        - start (str): Start date of the range (MM/DD/YYYY).
+        - end (str): End date of the range (MM/DD/YYYY).
+        - planner (SlicePlanner): Optional planner for the uncovered dates. Without one, each gap
+          is a single slice.
+
+        Returns:
+        - list of tuples: (start, end) MM/DD/YYYY strings in date order.
+        """
+        start, end = pd.to_datetime(start), pd.to_datetime(end)
+        one_day = timedelta(days=1)
+
+        gaps = []
+        cursor = start
+        for first, last in self._slices(start, end, ["done"]):
+            if first > cursor:
+                gaps.append((cursor, first - one_day))
+            cursor = max(cursor, last + one_day)
+        if cursor <= end:
+            gaps.append((cursor, end))
+
+        unfinished = {}
+        for first, last in self._slices(start, end, ["started", "results"]):
+            unfinished.setdefault(first, last)
+
+        slices = []
+        for gap_start, gap_end in gaps:
+            resumed_end = unfinished.get(gap_start)
+            if resumed_end is not None and resumed_end <= gap_end:
+                logging.info(f"Resuming interrupted slice {gap_start:%m/%d/%Y} to {resumed_end:%m/%d/%Y}.")
+                slices.append((_us(gap_start), _us(resumed_end)))
+                gap_start = resumed_end + one_day
+            if gap_start <= gap_end:
+                if planner is None:
+                    slices.append((_us(gap_start), _us(gap_end)))
+                else:
+                    slices.extend(planner.plan(_us(gap_start), _us(gap_end)))
+        return slices
+
+    def close(self):
+        self._conn.close()
+
+class SliceCheckpoint:
+    """Progress of one date slice: its results pages and the property details extracted so far."""
+
+    def __init__(self, journal, start, end):
+        self.journal = journal
+        self.key = (journal.filters, _iso(start), _iso(end))
+
+    @property
+    def _conn(self):
+        return self.journal._conn
+
+    def _set_status(self, status, num_entries=None):
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO slices VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (filters, start, end) DO UPDATE SET status = excluded.status, "
+                "num_entries = COALESCE(excluded.num_entries, slices.num_entries), updated_at = excluded.updated_at",
+                (*self.key, status, num_entries, time.time()),
+            )
+
+    def status(self):
+        row = self._conn.execute(
+            "SELECT status FROM slices WHERE filters = ? AND start = ? AND end = ?", self.key
+        ).fetchone()
+        return row[0] if row else None
+
+    def begin(self, num_entries):
+        if self.status() is None:
+            self._set_status("started", num_entries)
+
+    def results_pages(self):
+        """
+        Returns:
+        - list of pd.DataFrame: The saved results pages, or None if the results phase did not finish.
+        """
+        if self.status() not in ("results", "done"):
+            return None
+        rows = self._conn.execute(
+            "SELECT data FROM results_pages WHERE filters = ? AND start = ? AND end = ? ORDER BY page", self.key
+        ).fetchall()
+        return [pd.read_json(StringIO(data), orient="split", dtype=False) for (data,) in rows]
+
+    def save_results_pages(self, pages):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results_pages VALUES (?, ?, ?, ?, ?)",
+                [(*self.key, page, df.to_json(orient="split", index=False)) for page, df in enumerate(pages)],
+            )
+        self._set_status("results")
+
+    def property_details(self):
+        """
+        Returns:
+        - dict: Position in the results to the extracted details DataFrame. Failed extractions
+          saved by older versions are left out so they are retried.
+        """
+        rows = self._conn.execute(
+            "SELECT position, data FROM property_details WHERE filters = ? AND start = ? AND end = ? "
+            "AND data IS NOT NULL",
+            self.key,
+        ).fetchall()
+        return {position: pd.read_json(StringIO(data), orient="split", dtype=False) for position, data in rows}
+
+    def save_property_details(self, position, details):
+        """Records the details extracted for a position. A failed extraction (None) is not recorded."""
+        if details is None:
+            return
+        parcel_id = str(details["parcel_id"].iloc[0])
+        data = details.to_json(orient="split", index=False)
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO property_details VALUES (?, ?, ?, ?, ?, ?)",
+                (*self.key, position, parcel_id, data),
+            )
+
+    def finish(self):
+        """Marks the slice done and drops its saved pages and details, which are now in the homes dataset."""
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM results_pages WHERE filters = ? AND start = ? AND end = ?", self.key
+            )
+            self._conn.execute(
+                "DELETE FROM property_details WHERE filters = ? AND start = ? AND end = ?", self.key
+            )
+        self._set_status("done")
@@ -0,0 +1,176 @@
+import time
+import logging
+import threading
+import multiprocessing
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces calls evenly so no more than `rate` start per second.
+
+    Every caller shares the same schedule, so the limit holds for the whole process no
+    matter how many worker threads call `acquire`.
+    """
+
+    def __init__(self, rate):
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be a positive number of calls per second, or None for no limit.")
+        self.rate = rate
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self):
+        return 1.0 / self.rate if self.rate else 0.0
+
+    def acquire(self):
+        """Blocks until the caller may make its next call."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def record(self, latency, ok=True):
+        """Fixed-rate limiters ignore response feedback."""
+        pass
+
+class SharedRateLimiter:
+    """
+    Rate limiter whose schedule is shared by every process it is passed to.
+
+    Works like `RateLimiter`, but the next free slot lives in shared memory, so the limit holds
+    for the total rate of a pool of worker processes.
+
+    Parameters:
+    - rate (float): Maximum calls per second across all processes.
+    - context: multiprocessing context used to create the shared value and lock. Defaults to the
+      current default context; pass the same context used to start the workers.
+    """
+
+    def __init__(self, rate, context=None):
+        if rate <= 0:
+            raise ValueError("rate must be a positive number of calls per second.")
+        context = context or multiprocessing.get_context()
+        self.rate = rate
+        self._next_slot = context.Value("d", time.time(), lock=False)
+        self._lock = context.Lock()
+
+    @property
+    def interval(self):
+        return 1.0 / self.rate
+
+    def acquire(self):
+        """Blocks until the caller may make its next call."""
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot.value)
+            self._next_slot.value = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def record(self, latency, ok=True):
+        """Fixed-rate limiters ignore response feedback."""
+        pass
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    Rate limiter that adjusts its rate to how the server is responding (additive increase,
+    multiplicative decrease).
+
+    Callers report each response with `record`. While responses are healthy and faster than
+    `slow_latency`, the rate grows by `increase_rpm` per response up to `max_rpm`. A failure, a
+    timeout or a slow response cuts it by `decrease_factor`, down to `min_rpm`. The current rate
+    is logged every `report_every` responses and is available from `metrics`.
+
+    Parameters:
+    - initial_rpm (float): Starting requests per minute.
+    - max_rpm (float): Ceiling on requests per minute.
+    - min_rpm (float): Floor on requests per minute.
+    - increase_rpm (float): Requests per minute added after each healthy response.
+    - decrease_factor (float): Multiplier applied to the rate after an unhealthy response.
+    - slow_latency (float): Response time in seconds above which the server counts as struggling.
+    - report_every (int): Responses between metric log lines. Default is 25.
+    """
+
+    def __init__(self, initial_rpm, max_rpm, min_rpm, increase_rpm, decrease_factor, slow_latency, report_every=25):
+        if not 0 < min_rpm <= initial_rpm <= max_rpm:
+            raise ValueError("Rates must satisfy 0 < min_rpm <= initial_rpm <= max_rpm.")
+        super().__init__(initial_rpm / 60)
+        self.max_rpm = max_rpm
+        self.min_rpm = min_rpm
+        self.increase_rpm = increase_rpm
+        self.decrease_factor = decrease_factor
+        self.slow_latency = slow_latency
+        self.report_every = report_every
+        self.responses = 0
+        self.failures = 0
+        self.slow_responses = 0
+        self.total_latency = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Builds a limiter from the `throttle_*` settings of `scraping_config`, with the site-wide
+        `politeness_requests_per_minute` as its ceiling.
+        """
+        return cls(
+            initial_rpm=config["throttle_initial_requests_per_minute"],
+            max_rpm=config["politeness_requests_per_minute"],
+            min_rpm=config["throttle_min_requests_per_minute"],
+            increase_rpm=config["throttle_increase_requests_per_minute"],
+            decrease_factor=config["throttle_decrease_factor"],
+            slow_latency=config["throttle_slow_latency_seconds"],
+        )
+
+    @property
+    def requests_per_minute(self):
+        return self.rate * 60
+
+    def record(self, latency, ok=True):
+        """
+        Reports one response and adjusts the rate.
+
+        Parameters:
+        - latency (float): Seconds the request took, including any wait for the page to load.
+        - ok (bool): False for a failed or timed-out request.
+        """
+        with self._lock:
+            self.responses += 1
+            self.total_latency += latency
+            slow = latency > self.slow_latency
+            self.failures += not ok
+            self.slow_responses += ok and slow
+            if ok and not slow:
+                rpm = min(self.max_rpm, self.requests_per_minute + self.increase_rpm)
+            else:
+                rpm = max(self.min_rpm, self.requests_per_minute * self.decrease_factor)
+            self.rate = rpm / 60
+            report = self.responses % self.report_every == 0
+        if not ok or slow:
+            logging.info(f"Backing off to {rpm:.1f} requests/min after a {'failed' if not ok else 'slow'} response ({latency:.1f}s).")
+        if report:
+            self.log_metrics()
+
+    def metrics(self):
+        """
+        Returns:
+        - dict: Current requests per minute, responses seen, failure and slow-response rates, and mean latency.
+        """
+        with self._lock:
+            responses = max(self.responses, 1)
+            return {
+                "requests_per_minute": round(self.requests_per_minute, 2),
+                "responses": self.responses,
+                "failure_rate": round(self.failures / responses, 4),
+                "slow_rate": round(self.slow_responses / responses, 4),
+                "mean_latency": round(self.total_latency / responses, 3),
+            }
+
+    def log_metrics(self):
+        metrics = self.metrics()
+        logging.info(
+            f"Throttle: {metrics['requests_per_minute']} requests/min, {metrics['responses']} responses, "
+            f"{metrics['failure_rate']:.1%} failed, {metrics['slow_rate']:.1%} slow, "
+            f"{metrics['mean_latency']}s mean latency."
+        )
@@ -0,0 +1,150 @@
+import os
+import glob
+import sqlite3
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+
+from config import data_storage
+from utils.homes_data import sale_key_hashes, harmonize_homes, parse_transfer_dates
+
+class SaleIndex:
+    """
+    Persistent hash index of the sales written to a set of homes files, so writers can skip sales
+    that are already there before appending.
+
+    Sale key hashes (`sale_key_hashes`) are kept in a Python set for constant time lookups and
+    saved to SQLite, so the index survives restarts. Keys missing from the set are looked up in
+    SQLite too, so several processes can share one index file.
+
+    Parameters:
+    - path (str): Path to the SQLite file. None keeps the index in memory only.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._conn = sqlite3.connect(path or ":memory:", timeout=30)
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS sales (key INTEGER PRIMARY KEY)")
+        # SQLite integers are signed, so the uint64 hashes are stored as their int64 bit patterns
+        self.keys = {key for (key,) in self._conn.execute("SELECT key FROM sales")}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return int(np.int64(np.uint64(key))) in self.keys
+
+    def is_new(self, df):
+        """
+        Returns:
+        - pd.Series: True for each row of `df` whose sale is not in the index or earlier in `df`.
+        """
+        hashes = sale_key_hashes(df).to_numpy().view(np.int64)
+        self._load_keys([int(key) for key in hashes if int(key) not in self.keys])
+        seen = pd.Series(hashes, index=df.index).duplicated()
+        return pd.Series([int(key) not in self.keys for key in hashes], index=df.index) & ~seen
+
+    def _load_keys(self, keys, batch_size=500):
+        """Adds the given keys to the set if another process has saved them to the SQLite file."""
+        if self.path is None:
+            return
+        for i in range(0, len(keys), batch_size):
+            batch = keys[i:i + batch_size]
+            placeholders = ", ".join("?" for _ in batch)
+            rows = self._conn.execute(f"SELECT key FROM sales WHERE key IN ({placeholders})", batch)
+            self.keys.update(key for (key,) in rows)
+
+    def add(self, df):
+        """Records the sales of `df`."""
+        new_keys = {int(key) for key in sale_key_hashes(df).to_numpy().view(np.int64)} - self.keys
+        with self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO sales VALUES (?)", [(key,) for key in new_keys])
+        self.keys |= new_keys
+        return len(new_keys)
+
+    def filter_new(self, df):
+        """
+        Keeps the rows of `df` whose sales are not indexed yet. They are not recorded, so callers
+        `add` them once they are saved and a failed save does not hide them from later attempts.
+
+        Returns:
+        - pd.DataFrame: The new rows, ready to be appended.
+        """
+        new_rows = df[self.is_new(df)]
+        if len(new_rows) < len(df):
+            logging.info(f"Skipping {len(df) - len(new_rows)} sales that were already saved.")
+        return new_rows
+
+    def close(self):
+        self._conn.close()
+
+def compact_csv(path, apply=False):
+    """
+    Rewrites a homes CSV without repeated sales, keeping the last row of each sale as the homes
+    dataset and loader do. Rows without a parcel number or transfer date are never treated as
+    repeats.
+
+    Parameters:
+    - path (str): The CSV to compact.
+    - apply (bool): Whether to rewrite the file. By default only the savings are reported.
+
+    Returns:
+    - dict: Rows and bytes before and after, and the rows and bytes reclaimed.
+    """
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    harmonized = harmonize_homes(df)
+    keyed = (harmonized["parcel_number"].str.strip() != "") & parse_transfer_dates(harmonized["transfer_date"]).notna()
+    compacted = df[~(sale_key_hashes(df).duplicated(keep="last") & keyed)]
+    before_bytes = os.path.getsize(path)
+    text = compacted.to_csv(index=False)
+    after_bytes = len(text.encode("utf-8"))
+    if apply and len(compacted) < len(df):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8", newline="") as file:
+            file.write(text)
+        os.replace(temp_path, path)
+    return {
+        "rows": len(df),
+        "rows_after": len(compacted),
+        "rows_reclaimed": len(df) - len(compacted),
+        "bytes": before_bytes,
+        "bytes_after": after_bytes,
+        "bytes_reclaimed": before_bytes - after_bytes,
+    }
+
+def compact_csvs(patterns=None, apply=False):
+    """
+    Compacts every matching homes CSV with `compact_csv`.
+
+    Parameters:
+    - patterns (list of str): Glob patterns of the CSVs. Defaults to `data_storage["homes_sources"]`.
+    - apply (bool): Whether to rewrite the files. By default only the savings are reported.
+
+    Returns:
+    - dict: Report per file, and a "total" entry summing the rows and bytes reclaimed.
+    """
+    report = {}
+    for pattern in patterns or data_storage["homes_sources"]:
+        for path in sorted(glob.glob(pattern)):
+            report[path] = compact_csv(path, apply)
+    report["total"] = {
+        key: sum(file_report[key] for file_report in report.values())
+        for key in ["rows_reclaimed", "bytes_reclaimed"]
+    }
+    logging.info(
+        f"{'Reclaimed' if apply else 'Could reclaim'} {report['total']['rows_reclaimed']} rows and "
+        f"{report['total']['bytes_reclaimed']} bytes across {len(report) - 1} files."
+    )
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove repeated sales from the homes CSVs.")
+    parser.add_argument("patterns", nargs="*", help="Glob patterns of the CSVs. Defaults to every homes source.")
+    parser.add_argument("--apply", action="store_true", help="Rewrite the files instead of only reporting.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    for path, file_report in compact_csvs(args.patterns or None, args.apply).items():
+        print(f"{path}: {file_report}")
@@ -0,0 +1,274 @@
+import os
+import json
+import struct
+import logging
+import numpy as np
+import pandas as pd
+
+from config import spatial_config, school_district_irn_map
+
+# Shapefile shape types that store polygon rings (Polygon, PolygonZ, PolygonM)
+POLYGON_SHAPE_TYPES = {5, 15, 25}
+
+def read_dbf(path, encoding="utf-8"):
+    """
+    Reads the attribute records of a dBase (.dbf) file.
+
+    Parameters:
+    - path (str): Path to the .dbf file.
+    - encoding (str): Text encoding of the character fields. Default is "utf-8".
+
+    Returns:
+    - list of dict: One dictionary of stripped string values per record, in file order.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+
+    num_records, header_length, record_length = struct.unpack("<IHH", data[4:12])
+    fields = []
+    offset = 32
+    while data[offset] != 0x0D:
+        name = data[offset:offset + 11].split(b"\0", 1)[0].decode("ascii")
+        fields.append((name, data[offset + 16]))
+        offset += 32
+
+    records = []
+    for i in range(num_records):
+        start = header_length + i * record_length
+        # The first byte of each record is the deletion flag
+        position = start + 1
+        record = {}
+        for name, length in fields:
+            record[name] = data[position:position + length].decode(encoding, errors="replace").strip()
+            position += length
+        records.append(record)
+    return records
+
+def read_shp_polygons(path):
+    """
+    Reads the polygon rings of every record in an ESRI shapefile (.shp).
+
+    Returns:
+    - list of list of np.ndarray: For each record, its rings as (n, 2) arrays of longitude/latitude.
+      Null or non-polygon shapes have no rings.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+
+    shapes = []
+    offset = 100
+    while offset < len(data):
+        content_length = struct.unpack(">i", data[offset + 4:offset + 8])[0] * 2
+        content = data[offset + 8:offset + 8 + content_length]
+        offset += 8 + content_length
+
+        shape_type = struct.unpack("<i", content[:4])[0]
+        if shape_type not in POLYGON_SHAPE_TYPES:
+            shapes.append([])
+            continue
+        num_parts, num_points = struct.unpack("<ii", content[36:44])
+        parts = list(struct.unpack(f"<{num_parts}i", content[44:44 + 4 * num_parts])) + [num_points]
+        points_start = 44 + 4 * num_parts
+        points = np.frombuffer(content, dtype="<f8", count=2 * num_points, offset=points_start).reshape(-1, 2)
+        shapes.append([points[parts[i]:parts[i + 1]] for i in range(num_parts)])
+    return shapes
+
+def read_geojson_polygons(path):
+    """
+    Reads the Polygon and MultiPolygon features of a GeoJSON file.
+
+    Returns:
+    - tuple: (list of property dicts, list of rings per feature), in feature order.
+    """
+    with open(path, "r") as file:
+        features = json.load(file)["features"]
+
+    properties, shapes = [], []
+    for feature in features:
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") == "Polygon":
+            polygons = [geometry["coordinates"]]
+        elif geometry.get("type") == "MultiPolygon":
+            polygons = geometry["coordinates"]
+        else:
+            polygons = []
+        properties.append({key: str(value) for key, value in (feature.get("properties") or {}).items()})
+        shapes.append([np.asarray(ring, dtype=float)[:, :2] for polygon in polygons for ring in polygon])
+    return properties, shapes
+
+def load_polygons(path):
+    """
+    Loads polygon features from a shapefile (with its .dbf alongside) or a GeoJSON file.
+
+    Returns:
+    - tuple: (list of property dicts, list of rings per feature).
+    """
+    if path.lower().endswith((".geojson", ".json")):
+        return read_geojson_polygons(path)
+    return read_dbf(os.path.splitext(path)[0] + ".dbf"), read_shp_polygons(path)
+
+class PolygonIndex:
+    """
+    Point-in-polygon index for a set of named regions, e.g. school districts or zip codes.
+
+    Each region's edges are bucketed into horizontal bands, so a point is only tested against
+    the edges that cross its band. Lookups are vectorized over arrays of points.
+
+    Parameters:
+    - regions (dict): Region name to a list of rings, each an (n, 2) array of longitude/latitude.
+      Rings of the same region are combined with the even-odd rule, so holes and multi-part
+      regions work.
+    - band_height (float): Height of each band in degrees. Default is 0.005.
+    """
+
+    def __init__(self, regions, band_height=0.005):
+        self.band_height = band_height
+        self.names = []
+        self.bounds = []
+        self.edges = []
+        self.bands = []
+
+        for name, rings in regions.items():
+            rings = [np.asarray(ring, dtype=float) for ring in rings if len(ring) >= 3]
+            if not rings:
+                continue
+            starts = np.concatenate([ring for ring in rings])
+            ends = np.concatenate([np.roll(ring, -1, axis=0) for ring in rings])
+            edges = np.hstack([starts, ends])
+            # Horizontal edges never cross a horizontal ray
+            edges = edges[edges[:, 1] != edges[:, 3]]
+
+            min_x, min_y = starts.min(axis=0)
+            max_x, max_y = starts.max(axis=0)
+            num_bands = max(1, int(np.ceil((max_y - min_y) / band_height)))
+            edge_low = np.minimum(edges[:, 1], edges[:, 3])
+            edge_high = np.maximum(edges[:, 1], edges[:, 3])
+            first_band = np.clip(((edge_low - min_y) / band_height).astype(int), 0, num_bands - 1)
+            last_band = np.clip(((edge_high - min_y) / band_height).astype(int), 0, num_bands - 1)
+            bands = [np.nonzero((first_band <= b) & (last_band >= b))[0] for b in range(num_bands)]
+
+            self.names.append(name)
+            self.bounds.append((min_x, min_y, max_x, max_y))
+            self.edges.append(edges)
+            self.bands.append(bands)
+
+    @classmethod
+    def from_file(cls, path, name_field, name_map=None, band_height=0.005):
+        """
+        Builds an index from a shapefile or GeoJSON file.
+
+        Parameters:
+        - path (str): Path to the .shp or .geojson file.
+        - name_field (str): Attribute holding each feature's identifier.
+        - name_map (dict): Optional mapping of identifier to region name. Features whose identifier
+          is not in the mapping are skipped.
+        - band_height (float): Height of each band in degrees. Default is 0.005.
+        """
+        properties, shapes = load_polygons(path)
+        regions = {}
+        for record, rings in zip(properties, shapes):
+            key = record.get(name_field)
+            if name_map is not None:
+                if key not in name_map:
+                    continue
+                key = name_map[key]
+            regions.setdefault(key, []).extend(rings)
+        logging.info(f"Loaded {len(regions)} regions from {path}.")
+        return cls(regions, band_height=band_height)
+
+    def _contains(self, i, x, y):
+        """Even-odd test of points against region `i`, one band of edges at a time."""
+        min_y = self.bounds[i][1]
+        edges = self.edges[i]
+        bands = self.bands[i]
+        inside = np.zeros(len(x), dtype=bool)
+        band_ids = np.clip(((y - min_y) / self.band_height).astype(int), 0, len(bands) - 1)
+
+        for band in np.unique(band_ids):
+            points = np.nonzero(band_ids == band)[0]
+            x1, y1, x2, y2 = (edges[bands[band], k][None, :] for k in range(4))
+            px = x[points][:, None]
+            py = y[points][:, None]
+            crosses = (y1 > py) != (y2 > py)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                intersect_x = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+            inside[points] = np.count_nonzero(crosses & (px < intersect_x), axis=1) % 2 == 1
+        return inside
+
+    def lookup(self, longitudes, latitudes):
+        """
+        Finds the region containing each point.
+
+        Parameters:
+        - longitudes (array-like): Point longitudes.
+        - latitudes (array-like): Point latitudes.
+
+        Returns:
+        - np.ndarray: Region name of each point, or None where no region contains it or the
+          coordinates are missing.
+        """
+        x = pd.to_numeric(pd.Series(longitudes), errors="coerce").to_numpy(dtype=float)
+        y = pd.to_numeric(pd.Series(latitudes), errors="coerce").to_numpy(dtype=float)
+        result = np.full(len(x), None, dtype=object)
+        unresolved = ~(np.isnan(x) | np.isnan(y))
+
+        for i, (min_x, min_y, max_x, max_y) in enumerate(self.bounds):
+            candidates = np.nonzero(
+                unresolved & (x >= min_x) & (x <= max_x) & (y >= min_y) & (y <= max_y)
+            )[0]
+            if len(candidates) == 0:
+                continue
+            hits = candidates[self._contains(i, x[candidates], y[candidates])]
+            result[hits] = self.names[i]
+            unresolved[hits] = False
+        return result
+
+_district_index = None
+
+def get_district_index():
+    """
+    Loads the school district index from the first shapes file in `spatial_config` that exists.
+    The index is built once per process. Districts are named as in `school_city_map`, e.g. "SYCAMORE CSD".
+    """
+    global _district_index
+    if _district_index is None:
+        paths = [path for path in spatial_config["district_shapes"] if os.path.exists(path)]
+        if not paths:
+            raise FileNotFoundError(
+                f"No school district shapes found. Add one of: {', '.join(spatial_config['district_shapes'])}"
+            )
+        irn_names = {irn: name for name, irn in school_district_irn_map.items()}
+        _district_index = PolygonIndex.from_file(
+            paths[0],
+            spatial_config["district_id_field"],
+            name_map=irn_names,
+            band_height=spatial_config["band_height_degrees"],
+        )
+    return _district_index
+
+def assign_school_districts(df, index=None):
+    """
+    Looks up the school district of every geocoded home from its longitude and latitude.
+
+    Adds a `spatial_school_district` column, fills in `school_district` where it is missing, and adds
+    a `school_district_mismatch` flag where the scraped and spatial districts disagree.
+
+    Parameters:
+    - df (pd.DataFrame): Homes with `longitude` and `latitude` columns.
+    - index (PolygonIndex): Index to use. Defaults to the school district index from `get_district_index`.
+
+    Returns:
+    - pd.DataFrame: A copy of `df` with the district columns added.
+    """
+    index = index if index is not None else get_district_index()
+    spatial = pd.Series(index.lookup(df["longitude"], df["latitude"]), index=df.index, dtype=object)
+
+    df = df.assign(spatial_school_district=spatial)
+    if "school_district" in df.columns:
+        df["school_district_mismatch"] = (
+            spatial.notna() & df["school_district"].notna() & (spatial != df["school_district"])
+        )
+        df["school_district"] = df["school_district"].fillna(spatial)
+    else:
+        df["school_district"] = spatial
+    return df
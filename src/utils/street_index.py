@@ -0,0 +1,95 @@
+import difflib
+from collections import defaultdict
+
+def street_ngrams(name, n=3):
+    """
+    Returns the character n-grams of a street name, padded with a space on each side so the
+    first and last letters count as much as the rest, e.g. " MA", "MAI", "AIN", "IN ".
+    """
+    padded = f" {name} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+class StreetNameIndex:
+    """
+    Approximate fuzzy street name lookup that scores names like `difflib.get_close_matches`
+    without comparing each name against the whole vocabulary.
+
+    Names are indexed by their character trigrams. A lookup only scores the `max_candidates`
+    names that share the most trigrams with the input and whose length allows a ratio above the
+    cutoff, then picks the best `difflib.SequenceMatcher` ratio among them, breaking ties as
+    difflib does. A close name outside those candidates is missed, so the result can differ from
+    `get_close_matches`, mostly for weak matches that only share the street suffix. Results are
+    memoized per input and cutoff.
+
+    Parameters:
+    - valid_names (iterable of str): The street vocabulary.
+    - max_candidates (int): Most names scored per lookup. Default is 50.
+    """
+
+    def __init__(self, valid_names, max_candidates=50):
+        self.names = [name for name in dict.fromkeys(valid_names) if isinstance(name, str)]
+        self.exact = set(self.names)
+        self.max_candidates = max_candidates
+        self.lengths = {len(name) for name in self.names}
+        self.postings = defaultdict(list)
+        for position, name in enumerate(self.names):
+            for gram in street_ngrams(name):
+                self.postings[gram].append(position)
+        self._memo = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def candidates(self, street_name, cutoff):
+        """
+        Returns the indexed names worth scoring for `street_name`, most shared trigrams first.
+        """
+        # ratio = 2 * matches / (len(a) + len(b)) cannot reach the cutoff when the lengths differ too
+        # much. The bound is computed as `real_quick_ratio` does so rounding agrees with difflib.
+        size = len(street_name)
+        lengths = {
+            length for length in self.lengths
+            if size + length and 2.0 * min(size, length) / (size + length) >= cutoff
+        }
+        shared = defaultdict(int)
+        for gram in street_ngrams(street_name):
+            for position in self.postings.get(gram, ()):
+                shared[position] += 1
+        ranked = sorted(
+            (position for position in shared if len(self.names[position]) in lengths),
+            key=lambda position: -shared[position],
+        )
+        return [self.names[position] for position in ranked[:self.max_candidates]]
+
+    def best_match(self, street_name, cutoff=0.8):
+        """
+        Finds the closest indexed name.
+
+        Parameters:
+        - street_name (str): The name to correct.
+        - cutoff (float): Lowest `SequenceMatcher` ratio accepted, as in `difflib.get_close_matches`.
+
+        Returns:
+        - str: The best match, or None if no name scores at least `cutoff`.
+        """
+        key = (street_name, cutoff)
+        if key in self._memo:
+            return self._memo[key]
+        if street_name in self.exact:
+            self._memo[key] = street_name
+            return street_name
+
+        best = None
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(street_name)
+        for name in self.candidates(street_name, cutoff):
+            matcher.set_seq1(name)
+            if matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff:
+                continue
+            score = matcher.ratio()
+            # get_close_matches keeps the largest (score, name) pair
+            if score >= cutoff and (best is None or (score, name) > best):
+                best = (score, name)
+        match = best[1] if best is not None else None
+        self._memo[key] = match
+        return match
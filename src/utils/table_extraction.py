@@ -1,21 +1,22 @@
 import pandas as pd
-from io import StringIO
 
 import logging
-from config import XPATHS
+from utils.html_tables import parse_html_table
 
 # Selenium-related imports
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import ElementNotInteractableException,TimeoutException
 
-def scrape_table_by_xpath(wait, xpath):
+def scrape_table_by_xpath(wait, xpath, columns=None, dtypes=None):
     """
     Scrapes an HTML table by its XPath.
 
     Args:
         wait: WebDriverWait instance for Selenium.
         xpath: XPath of the table to scrape.
+        columns: Optional column names, passed on to `parse_html_table`.
+        dtypes: Optional column dtypes, passed on to `parse_html_table`.
 
     Returns:
         A pandas DataFrame containing the table data, or an empty DataFrame if scraping fails.
@@ -25,7 +26,7 @@ def scrape_table_by_xpath(wait, xpath):
         return pd.DataFrame()
     try:
         html = wait.until(EC.visibility_of_element_located((By.XPATH, xpath))).get_attribute("outerHTML")
-        return pd.read_html(StringIO(html))[0]
+        return parse_html_table(html, columns=columns, dtypes=dtypes)
     except TimeoutException as e:
         logging.error(f"Table at {xpath} not found: {e}")
         return pd.DataFrame()
@@ -76,12 +77,3 @@ def find_click_row(driver, wait, xpath:str):
     row = driver.find_element(By.XPATH, xpath)
     wait.until(EC.element_to_be_clickable((By.XPATH, xpath)))
     scroll_and_click(driver, wait, row)
-
-def transform_table(table):
-    if table.empty:
-        logging.warning("Received an empty table for transformation.")
-        return pd.DataFrame()  # Return an empty DataFrame if input is empty
-    table = table.T.reset_index(drop=True)
-    table.columns = table.iloc[0,:]
-    table = table.drop(0,axis=0)
-    return table
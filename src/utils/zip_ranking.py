@@ -0,0 +1,106 @@
+import glob
+import logging
+from collections import Counter, defaultdict
+import pandas as pd
+
+from config import zip_code_map
+from utils.address_cleaners import normalize_street
+
+# Zip code at the end of a Google formatted address, e.g. "101 Fieldstone Dr, Terrace Park, OH 45174, USA"
+FORMATTED_ZIP_PATTERN = r"\b(\d{5})(?:-\d{4})?, USA$"
+
+def resolved_zips(df):
+    """
+    Works out the known zip code of each row of a homes DataFrame.
+
+    The zip comes from `formatted_address` when the row was geocoded, otherwise from the owner's
+    postal code when the owner lives at the home (`owner_home_address_match == "Y"`).
+
+    Returns:
+    - pd.Series: Integer zip codes aligned with `df`, missing where no zip is known.
+    """
+    zips = pd.Series(pd.NA, index=df.index, dtype="Int64")
+    if "owner_postal_code" in df.columns and "owner_home_address_match" in df.columns:
+        owner_zips = pd.to_numeric(df["owner_postal_code"], errors="coerce").astype("Int64")
+        zips = owner_zips.where(df["owner_home_address_match"] == "Y")
+    if "formatted_address" in df.columns:
+        formatted_zips = pd.to_numeric(
+            df["formatted_address"].astype("string").str.extract(FORMATTED_ZIP_PATTERN)[0], errors="coerce"
+        ).astype("Int64")
+        zips = formatted_zips.fillna(zips)
+    return zips
+
+class ZipCandidateRanker:
+    """
+    Orders the candidate zip codes of a school district so the most likely one is queried first.
+
+    Candidates are ranked by the owner's postal code when the owner lives at the home, then by how
+    often each zip was resolved for the same street, then by how often it was resolved anywhere in
+    the district. Ties keep the order of `zip_code_map`.
+    """
+
+    def __init__(self):
+        self.street_zips = defaultdict(Counter)
+        self.district_zips = defaultdict(Counter)
+
+    def record(self, df):
+        """
+        Adds the resolved zips of a homes DataFrame with `school_district` and `street` columns.
+
+        Returns:
+        - int: Number of rows with a known zip that were recorded.
+        """
+        if "school_district" not in df.columns or "street" not in df.columns:
+            return 0
+        known = pd.DataFrame({
+            "school_district": df["school_district"],
+            "street": df["street"].map(normalize_street),
+            "zip_code": resolved_zips(df),
+        }).dropna()
+
+        for (school_district, street, zip_code), count in known.value_counts().items():
+            self.street_zips[(school_district, street)][int(zip_code)] += count
+            self.district_zips[school_district][int(zip_code)] += count
+        return len(known)
+
+    @classmethod
+    def from_csvs(cls, patterns):
+        """
+        Builds a ranker from historical CSVs. Files without the needed columns are skipped.
+
+        Parameters:
+        - patterns (list of str): Glob patterns of the CSV files to read.
+        """
+        ranker = cls()
+        wanted = {"school_district", "street", "formatted_address", "owner_postal_code", "owner_home_address_match"}
+        for pattern in patterns:
+            for path in sorted(glob.glob(pattern)):
+                df = pd.read_csv(path, usecols=lambda col: col in wanted, dtype=str)
+                recorded = ranker.record(df)
+                logging.info(f"Recorded {recorded} resolved zip codes from {path}.")
+        return ranker
+
+    def rank(self, school_district, street=None, owner_postal_code=None):
+        """
+        Returns the candidate zip codes of a school district, most likely first.
+
+        Parameters:
+        - school_district (str): The school district of the home.
+        - street (str): The street of the home, if known.
+        - owner_postal_code (str or int): The owner's postal code, only if the owner lives at the home.
+
+        Returns:
+        - list of int: The zip codes to try in order.
+        """
+        street_counts = self.street_zips.get((school_district, normalize_street(street)), Counter())
+        district_counts = self.district_zips.get(school_district, Counter())
+        ranked = sorted(
+            zip_code_map.get(school_district, []),
+            key=lambda zip_code: (-street_counts[zip_code], -district_counts[zip_code]),
+        )
+
+        owner_zip = pd.to_numeric(owner_postal_code, errors="coerce")
+        if pd.notna(owner_zip):
+            owner_zip = int(owner_zip)
+            ranked = [owner_zip] + [zip_code for zip_code in ranked if zip_code != owner_zip]
+        return ranked